@@ -0,0 +1,298 @@
+import atexit
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import http_client
+
+# Local, process-shared cache for slow-changing API data (race schedule, rosters...).
+# Backed by a SQLite file so every gunicorn worker reads the same entries.
+CACHE_PATH = os.getenv("API_CACHE_PATH", "api_cache.db")
+REFRESH_CLAIM_SECONDS = 30  # how long one worker owns a background refresh
+
+MEMORY_TTL = 60  # Seconds a parsed entry is trusted before re-checking the database
+COUNTER_FLUSH_SECONDS = 10  # How often a process writes its counters to the database
+
+_local = threading.local()
+
+# Parsed copies of recently read entries: url -> (data, fetched_at, checked_at). Filled in
+# the gunicorn master by warmup.py, so forked workers start with it (copy-on-write).
+_memory = {}
+
+# Counter increments not written to the database yet (see incr())
+_counts = {"pid": os.getpid(), "pending": {}, "flushed_at": time.time()}
+_counts_lock = threading.Lock()
+
+
+def _connect():
+    """Return this thread's connection to the cache database, creating it if needed."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():  # Connections can't be shared with forked workers
+        conn = sqlite3.connect(CACHE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                refreshing_until REAL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS unavailable (
+                key TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                next_check REAL NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS generations (
+                key TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def incr(name, amount=1):
+    """Bump a shared counter (visible to every worker through stats()).
+
+    Counts are kept in process memory and written to the database at most every
+    COUNTER_FLUSH_SECONDS, so cache hits don't turn into writes.
+    """
+    with _counts_lock:
+        if _counts["pid"] != os.getpid():  # Forked: the parent's pending counts are its own
+            _counts.update(pid=os.getpid(), pending={}, flushed_at=time.time())
+        _counts["pending"][name] = _counts["pending"].get(name, 0) + amount
+        due = time.time() - _counts["flushed_at"] >= COUNTER_FLUSH_SECONDS
+    if due:
+        flush_counters()
+
+
+def flush_counters():
+    """Write this process's pending counts to the database."""
+    with _counts_lock:
+        if _counts["pid"] != os.getpid():
+            return
+        pending, _counts["pending"] = _counts["pending"], {}
+        _counts["flushed_at"] = time.time()
+    if pending:
+        _connect().executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            pending.items(),
+        )
+
+
+atexit.register(flush_counters)
+
+
+def stats():
+    """Return all counters as a dict, e.g. {"hit": 120, "miss": 2, ...}.
+
+    Other workers' counts show up once they flush (within COUNTER_FLUSH_SECONDS).
+    """
+    flush_counters()
+    rows = _connect().execute("SELECT name, value FROM counters ORDER BY name").fetchall()
+    return {name: value for name, value in rows}
+
+
+def _read(url):
+    return _connect().execute(
+        "SELECT body, etag, last_modified, fetched_at FROM entries WHERE url = ?", (url,)
+    ).fetchone()
+
+
+def _store(url, body, etag, last_modified):
+    fetched_at = time.time()
+    _connect().execute(
+        "INSERT OR REPLACE INTO entries (url, body, etag, last_modified, fetched_at, refreshing_until) "
+        "VALUES (?, ?, ?, ?, ?, NULL)",
+        (url, body, etag, last_modified, fetched_at),
+    )
+    return fetched_at
+
+
+def _fetch(url, cached=None):
+    """Download url, revalidating with ETag/Last-Modified when we already hold a copy."""
+    headers = {}
+    if cached:
+        if cached[1]:
+            headers["If-None-Match"] = cached[1]
+        if cached[2]:
+            headers["If-Modified-Since"] = cached[2]
+
+    response = http_client.get(url, headers=headers)
+    if cached and response.status_code == 304:
+        data = json.loads(cached[0])
+        _memory[url] = (data, _store(url, cached[0], cached[1], cached[2]), time.time())
+        incr("revalidated")
+        return data
+
+    response.raise_for_status()
+    data = response.json()  # Validate before caching so we never store a broken body
+    _memory[url] = (data, _store(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified")), time.time())
+    incr("fetched")
+    return data
+
+
+def _claim_refresh(url):
+    """Make sure only one worker refreshes a stale entry at a time."""
+    now = time.time()
+    cursor = _connect().execute(
+        "UPDATE entries SET refreshing_until = ? "
+        "WHERE url = ? AND (refreshing_until IS NULL OR refreshing_until < ?)",
+        (now + REFRESH_CLAIM_SECONDS, url, now),
+    )
+    return cursor.rowcount == 1
+
+
+def _refresh(url):
+    try:
+        _fetch(url, _read(url))
+    except Exception as e:
+        incr("refresh_error")
+        print(f"Error refreshing cached {url}: {e}")
+
+
+def _parsed(url, cached):
+    """json.loads() the cached body, reusing the in-memory copy when the entry hasn't changed."""
+    remembered = _memory.get(url)
+    data = remembered[0] if remembered and remembered[1] == cached[3] else json.loads(cached[0])
+    _memory[url] = (data, cached[3], time.time())
+    return data
+
+
+def get_json(url, ttl):
+    """Return the JSON body for url, serving from the local cache whenever possible.
+
+    Fresh entries are returned directly. Stale entries are still returned, and one
+    worker refreshes them in the background. Only a cold cache blocks on the network.
+    Callers must not modify the returned data (it's shared through the memory layer).
+    """
+    now = time.time()
+    remembered = _memory.get(url)
+    if remembered and now - remembered[2] < MEMORY_TTL and now - remembered[1] < ttl:
+        incr("memory_hit")
+        return remembered[0]
+
+    cached = _read(url)
+    if cached is None:
+        incr("miss")
+        return _fetch(url)
+
+    if now - cached[3] < ttl:
+        incr("hit")
+    else:
+        incr("stale")
+        if getattr(_local, "foreground", False):
+            try:
+                return _fetch(url, cached)
+            except Exception as e:
+                incr("refresh_error")
+                print(f"Error refreshing cached {url}: {e}")
+        elif _claim_refresh(url):
+            threading.Thread(target=_refresh, args=(url,), daemon=True).start()
+    return _parsed(url, cached)
+
+
+@contextlib.contextmanager
+def refresh_in_foreground():
+    """Refresh stale entries inline instead of on a background thread (for this thread only).
+
+    Used by the warm-up in the gunicorn master, which must not leave threads running when
+    it forks the workers.
+    """
+    _local.foreground = True
+    try:
+        yield
+    finally:
+        _local.foreground = False
+
+
+def peek(url):
+    """Return the cached JSON for url without fetching or counting (None if absent)."""
+    cached = _read(url)
+    return json.loads(cached[0]) if cached else None
+
+
+def get_or_compute(key, loader, ttl):
+    """Return the JSON-serializable value cached under key, calling loader() on a miss.
+
+    For locally derived data (e.g. per-user counts from the database). These entries are
+    never refreshed in the background; writers call invalidate(key) when the data changes.
+    """
+    cached = _read(key)
+    if cached is not None and time.time() - cached[3] < ttl:
+        incr("computed_hit")
+        return json.loads(cached[0])
+
+    incr("computed_miss")
+    # Note the key's generation before loading: if a writer invalidates the key while
+    # loader() runs, the value may predate the write, so it's returned but not stored
+    conn = _connect()
+    conn.execute("INSERT OR IGNORE INTO generations (key, generation) VALUES (?, 0)", (key,))
+    generation = conn.execute("SELECT generation FROM generations WHERE key = ?", (key,)).fetchone()[0]
+    value = loader()
+    conn.execute(
+        "INSERT OR REPLACE INTO entries (url, body, etag, last_modified, fetched_at, refreshing_until) "
+        "SELECT ?, ?, NULL, NULL, ?, NULL WHERE (SELECT generation FROM generations WHERE key = ?) = ?",
+        (key, json.dumps(value), time.time(), key, generation),
+    )
+    return value
+
+
+def invalidate(url):
+    """Drop a cached entry so the next get_json() call fetches it again."""
+    _memory.pop(url, None)
+    conn = _connect()
+    conn.execute("UPDATE generations SET generation = generation + 1 WHERE key = ?", (url,))
+    conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+
+
+def invalidate_prefix(prefix):
+    """Drop every entry whose key starts with prefix."""
+    for url in [url for url in _memory if url.startswith(prefix)]:
+        _memory.pop(url, None)
+    conn = _connect()
+    conn.execute("UPDATE generations SET generation = generation + 1 WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+    conn.execute("DELETE FROM entries WHERE substr(url, 1, ?) = ?", (len(prefix), prefix))
+
+
+# Negative cache: remember data that isn't published yet (e.g. results of a round that
+# just finished) and back off exponentially instead of asking again on every pass.
+def unavailable_until(key):
+    """Return the timestamp before which key shouldn't be requested again, or None."""
+    row = _connect().execute("SELECT next_check FROM unavailable WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def mark_unavailable(key, base_delay, max_delay):
+    """Record another miss for key and return the next time it's worth checking."""
+    conn = _connect()
+    row = conn.execute("SELECT attempts FROM unavailable WHERE key = ?", (key,)).fetchone()
+    attempts = (row[0] if row else 0) + 1
+    next_check = time.time() + min(base_delay * 2 ** (attempts - 1), max_delay)
+    conn.execute(
+        "INSERT OR REPLACE INTO unavailable (key, attempts, next_check) VALUES (?, ?, ?)",
+        (key, attempts, next_check),
+    )
+    return next_check
+
+
+def clear_unavailable(key):
+    _connect().execute("DELETE FROM unavailable WHERE key = ?", (key,))
@@ -1,57 +1,100 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, g
 from datetime import datetime
-import requests
+import http_client
 import json
+import hashlib
 #import sqlite3
-from supabase.client import create_client, Client
 import os
 from dotenv import load_dotenv
+import api_cache
+import storage
+import fanout
+import leaderboard
+import logo_assets
+import query_cache
+import instrumentation
+import schedule
+import changes
+import results
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = "your_secret_key"
+instrumentation.init_app(app)  # Server-Timing header and a JSON log line per request
+logo_assets.init_app(app)  # Hashed team logos can be cached for a year
+
+# Load configuration from JSON file
+with open("config.json") as config_file:
+    config = json.load(config_file)
 
 # Supabase configuration
 load_dotenv()
 url = os.getenv("supabaseURL")  # Replace with your project URL**
 key = os.getenv("supabaseKEY")  # Replace with your public anon key**
-supabase: Client = create_client(url, key)  # Initialize Supabase client
-
-
-# Load configuration from JSON file
-with open("config.json") as config_file:
-    config = json.load(config_file)
+supabase = query_cache.CachedClient(storage.create_client(config, url, key))  # Supabase (or local SQLite), reads memoized per request
 
 YEAR = config["year"]
 USERS_DB = {user["username"]: user for user in config["users"] if user["role"] == "Player"}
 #DB_PATH = "fantasy_f1.db" #commienting this out as I'm using a new database in Supabase
 
-F1_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+SCHEDULE_TTL = 6 * 60 * 60  # Seconds before the cached schedule is refreshed in the background
+ROSTER_TTL = 24 * 60 * 60  # Seconds before the cached driver roster is refreshed in the background
+ROSTER_CHECK_TTL = 60 * 60  # Seconds between checks of the stored results for drivers missing from the roster
+USAGE_TTL = 7 * 24 * 60 * 60  # Upper bound for cached per-user driver counts (invalidated on every pick)
+RESET_CHUNK_SIZE = 500  # Rows per bulk insert when prefilling a season
 
 # Combined function to create the database and prefill the race rounds
-def reset_database():
+def reset_database(dry_run=False, chunk_size=RESET_CHUNK_SIZE):
     # Remove SQLite-specific code and replace with Supabase calls
     print("Resetting database...")  # Replace print statements with actual Supabase actions
     
     # Reset and prefill race rounds using Supabase
     races = fetch_race_schedule()  # Fetch race schedule
+    if not races:
+        print("No race schedule available, aborting the reset.")
+        return
+
+    # Build every user x race row up front so they can be written in a few bulk inserts
+    rows = [
+        {
+            "username": user,
+            "race_round": int(race["round"]),
+            "selected_driver": None,
+            "points": None
+        }
+        for user in USERS_DB.keys()
+        for race in races
+    ]
+    chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+
+    if dry_run:
+        print(f"Dry run: would clear selections, finalized_rounds and round_results, then insert {len(rows)} rows "
+              f"({len(USERS_DB)} users x {len(races)} races) in {len(chunks)} bulk insert(s) of up to {chunk_size} rows.")
+        return
 
     # Use Supabase to delete all rows from the 'selections' table
     supabase.table("selections").delete().neq("username", "").execute()  # Delete selections table entries
 
-    for user in USERS_DB.keys():
-        for race in races:
-            # Use Supabase to insert race selection data
-            supabase.table("selections").insert({
-                "username": user,
-                "race_round": int(race["round"]),
-                "selected_driver": None,
-                "points": None
-            }).execute()
+    # Finished rounds and their results are keyed by round only, so last season's would
+    # otherwise keep this season's rounds from being scored
+    supabase.table("finalized_rounds").delete().gte("race_round", 0).execute()
+    supabase.table("round_results").delete().gte("race_round", 0).execute()
+
+    inserted = 0
+    for chunk in chunks:
+        supabase.table("selections").insert(chunk).execute()
+        inserted += len(chunk)
+        print(f"Inserted {inserted}/{len(rows)} selection rows")
+
+    # Polling clients have to reload everything
+    changes.record_reset(supabase)
+
+    # Every player's driver usage is back to zero
+    api_cache.invalidate_prefix(f"driver_usage:{YEAR}:")
 
-    # Reset the 'driver_selections' table
-    supabase.table("driver_selections").delete().neq("username", "").execute()  # Clear driver_selections table
+    # Start the leaderboard from zero for every player
+    leaderboard.rebuild(supabase, USERS_DB.keys())
 
     print("Database reset complete with race rounds prefilled.")
 
@@ -67,28 +110,52 @@ def print_database_contents():
 def fetch_race_schedule():
     url = f"https://api.jolpi.ca/ergast/f1/{YEAR}.json"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = api_cache.get_json(url, ttl=SCHEDULE_TTL)  # Served from the shared local cache
         races = [{"round": r["round"], "date": r["date"], "title": r["raceName"]} for r in data['MRData']['RaceTable']['Races']]
         return races
     except Exception as e:
         print(f"Error fetching race schedule: {e}")
         return []
 
+# The schedule as a parsed model (dates parsed once per schedule download, see schedule.py)
+def fetch_schedule_model():
+    url = f"https://api.jolpi.ca/ergast/f1/{YEAR}.json"
+    try:
+        return schedule.from_jolpica(url, api_cache.get_json(url, ttl=SCHEDULE_TTL))
+    except Exception as e:
+        print(f"Error fetching race schedule: {e}")
+        return schedule.Schedule([])
+
+# Per-user driver usage counts, derived from the selections (driver_usage view). They go
+# through the shared API cache (invalidated on every pick) and are kept on flask.g for the
+# rest of the request, so rendering the picker normally needs no database query at all
+def driver_usage_key(username):
+    return f"driver_usage:{YEAR}:{username}"
+
+
+def driver_usage_counts(username):
+    cache = g.setdefault("driver_usage", {})
+    if username not in cache:
+        def load():
+            rows = supabase.table("driver_usage").select("driver_code, selection_count").eq("username", username).execute().data
+            return {row["driver_code"]: row["selection_count"] for row in rows}
+        cache[username] = api_cache.get_or_compute(driver_usage_key(username), load, ttl=USAGE_TTL)
+    return cache[username]
+
+# Season roster as returned by Jolpica, cached per season (see results.py for mid-season changes)
+def fetch_roster():
+    url = f"https://api.jolpi.ca/ergast/f1/{YEAR}/drivers.json"
+    return api_cache.get_json(url, ttl=ROSTER_TTL)["MRData"]["DriverTable"]["Drivers"]
+
 # Fetch drivers for the season
 def fetch_drivers():
-    url = f"https://api.jolpi.ca/ergast/f1/{YEAR}/drivers.json"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        drivers = [{"code": d["code"], "name": f"{d['givenName']} {d['familyName']}"} for d in data["MRData"]["DriverTable"]["Drivers"]]
+        # A new driver in the stored results (e.g. a mid-season stand-in) drops the cached roster
+        api_cache.get_or_compute(f"roster_check:{YEAR}", lambda: results.check_roster(supabase, YEAR), ttl=ROSTER_CHECK_TTL)
+        drivers = [{"code": d["code"], "name": f"{d['givenName']} {d['familyName']}"} for d in fetch_roster()]
 
-        # Fetch selection counts from the database
-        # Replace SQLite query with Supabase query for driver selections**
-        selections = supabase.table("driver_selections").select("*").eq("username", session["username"]).execute().data
-        selection_counts = {row["driver_code"]: row["selection_count"] for row in selections}
+        # Selection counts come from the picks themselves
+        selection_counts = driver_usage_counts(session["username"])
 
         for driver in drivers:
             driver["selection_count"] = selection_counts.get(driver["code"], 0)
@@ -98,31 +165,10 @@ def fetch_drivers():
         print(f"Error fetching drivers: {e}")
         return []
 
-# Fetch and store race results for a specific round
-def fetch_and_store_results(race_round, selected_driver):
-    url = f"https://api.jolpi.ca/ergast/f1/{YEAR}/{race_round}/results.json"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        for result in data["MRData"]["RaceTable"]["Races"][0]["Results"]:
-            if result["Driver"]["code"] == selected_driver:
-                position = result.get("position")
-                if position:
-                    position = int(position)
-                    if position <= len(F1_POINTS):
-                        points = F1_POINTS[position - 1]
-                    else:
-                        points = None
-                else:
-                    points = None
-
-                # Use Supabase to update the selections table with points**
-                supabase.table("selections").update({"points": points}).eq("race_round", race_round).eq("selected_driver", selected_driver).execute()
-                break
-    except Exception as e:
-        print(f"Error fetching and storing race results for round {race_round}: {e}")
+# Fetch all of a user's selections in one query, indexed by race round
+def fetch_user_selections(username):
+    rows = supabase.table("selections").select("race_round, selected_driver, points").eq("username", username).execute().data
+    return {int(row["race_round"]): row for row in rows}
 
 
 @app.route('/')
@@ -133,103 +179,35 @@ def home():
     username = session["username"]
     role = USERS_DB[username]["role"]
 
-    # Fetch the races and results
-    races = fetch_race_schedule()
+    # Fetch the races, this user's selections and the leaderboard at the same time
+    race_schedule, selections_by_round, sorted_scores = fanout.gather(
+        fetch_schedule_model,
+        lambda: fetch_user_selections(username),  # Points are written by ingest_results.py, never from here
+        lambda: leaderboard.sorted_scores(supabase, USERS_DB.keys()),
+    )
 
     # Get today's date
     today = datetime.today().date()
 
-    # Find the current race round (based on today's date)
-    current_round = None
-    for race in races:
-        race_date = datetime.strptime(race["date"], "%Y-%m-%d").date()
-        if race_date >= today:  # Identify the current or next race
-            current_round = race["round"]
-            break
-
-    # Add "YOU ARE HERE" dynamically into the race schedule
-    you_are_here_inserted = False
-    for i, race in enumerate(races):
-        race_date = datetime.strptime(race["date"], "%Y-%m-%d").date()
-        if race_date >= today and not you_are_here_inserted:
-            races.insert(i, {
-                "round": None,
-                "title": "YOU ARE HERE",
-                "date": today.strftime("%Y-%m-%d"),
-                "you_are_here": True,
-            })
-            you_are_here_inserted = True
-            break
-    if not you_are_here_inserted:
-        races.append({
-            "round": None,
-            "title": "YOU ARE HERE",
-            "date": today.strftime("%Y-%m-%d"),
-            "you_are_here": True,
-        })
-
-    # Check race selection status and points
-    for race in races:
-        if race.get("you_are_here"):  # Skip processing for "YOU ARE HERE"
-            race["can_select_driver"] = False
-            race["selected_driver"] = None
-            race["points"] = None
-            continue
-
-
-        # Check if the user has already selected a driver for this race
-        # Fetch selections data from Supabase instead of SQLite**
-        selection = supabase.table("selections").select("selected_driver, points").eq("username", username).eq("race_round", race["round"]).execute().data
-
-        # If a driver is selected and the race date is in the past, fetch the results and update points
-        if selection and selection[0]["selected_driver"]:  # There is a driver selected
-            race_date = datetime.strptime(race["date"], "%Y-%m-%d").date()
-            if race_date < today and selection[0]["points"] is None:
-                selected_driver = selection[0]["selected_driver"]
-                fetch_and_store_results(race["round"], selected_driver)
-                updated_selection = supabase.table("selections").select("points").eq("username", username).eq("race_round", race["round"]).execute().data
-                race["points"] = updated_selection[0]["points"] if updated_selection else None
-            else:
-                race["points"] = selection[0]["points"] # Show the points if already updated
-
-        #conn.close()
-        
-        race["can_select_driver"] = race_date > today or selection is None or selection[0]["selected_driver"] is None  # Can select if race is in the future or no driver has been selected
-        race["selected_driver"] = selection[0]["selected_driver"] if selection else None
-
-    # Calculate scores from Supabase
-    #scores_from_db = supabase.table("selections").select("username, SUM(points)").group_by("username").execute().data
-    #scores_from_db = supabase.rpc("get_user_scores").execute().data #replaced since Supabase doesn't use groupby?
-    #disabling above bc rbc requires RLS and I don't get how to do this
-    # Get data from Supabase
-    data = supabase.table("selections").select("username", "points").execute().data
-
-    # Aggregate scores in Python
-    from collections import defaultdict
-
-    scores = defaultdict(int)
-    for row in data:
-        if row["points"] is not None:  # Ensure there's no None value for points
-            scores[row["username"]] += row["points"]
-
-    # Transform scores into a list of dictionaries
-    scores_from_db = [{"username": user, "total_points": points} for user, points in scores.items()]
-
-    # Create a dictionary from the scores_from_db
-    scores_dict = {row["username"]: row["total_points"] for row in scores_from_db}
-
-    # Ensure scores have a value for all players
-    all_users = USERS_DB.keys()  # Get all usernames from USERS_DB
-    scores = {user: scores_dict.get(user, 0) for user in all_users}
-    # Sort the dictionary by points in descending order
-    sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    # One row per race with this user's pick and points
+    races = []
+    for race in race_schedule:
+        selection = selections_by_round.get(race.round)
+        row = {
+            "round": race.round,
+            "title": race.title,
+            "date": race.iso_date,
+            "formatted_date": race.formatted_date,
+            "can_select_driver": race.date > today or selection is None or selection["selected_driver"] is None,  # Can select if race is in the future or no driver has been selected
+            "selected_driver": selection["selected_driver"] if selection else None,
+        }
+        if selection and selection["selected_driver"]:  # There is a driver selected
+            row["points"] = selection["points"]
+        races.append(row)
+
+    # Add "YOU ARE HERE" before the current or next race (found by date, no scan)
+    races.insert(race_schedule.next_index(today), schedule.you_are_here(today))
 
-    
-    print_database_contents()
-# In your home function, for each race, format the date:
-    for race in races:
-        race_date = datetime.strptime(race["date"], "%Y-%m-%d").date()  # Parse the date
-        race["formatted_date"] = race_date.strftime("%m/%d/%Y")  # Format the date to MM/DD/YYYY
     return render_template(
         "index.html",
         username=username,
@@ -269,54 +247,41 @@ def select_driver():
     if request.method == 'POST':
         selected_driver = request.form['driver']
 
-        # Check if the driver has already been selected twice
-        selection = supabase.table("driver_selections").select("selection_count").eq("username", username).eq("driver_code", selected_driver).execute().data
-
-        selection_count = selection[0]["selection_count"] if selection else 0
+        # Check if the driver has already been selected twice. Read fresh from the picks:
+        # the cached counts (driver_usage_counts) are only good enough for display.
+        usage = supabase.table("driver_usage").select("selection_count").eq("username", username).eq("driver_code", selected_driver).execute().data
+        selection_count = usage[0]["selection_count"] if usage else 0
 
         if selection_count >= 2:
             return "You can only select each driver twice per season."
 
-        # Check if the selection for the given race round already exists
-        existing_selection = supabase.table("selections").select("id").eq("username", username).eq("race_round", int(race_round)).execute().data
-
-        if existing_selection:  # If the selection exists, update the existing row
-            supabase.table("selections").update({
-                "selected_driver": selected_driver,
-                "points": None  # Set points to None or update with actual points if available
-            }).eq("username", username).eq("race_round", int(race_round)).execute()
-        else:  # Otherwise, insert a new row
-            supabase.table("selections").insert({
-                "username": username,
-                "race_round": int(race_round),
-                "selected_driver": selected_driver,
-                "points": None  # Set points to None or update with actual points if available
-            }).execute()
-
-        # Update the driver_selections table
-        if selection:
-            # Fetch the current selection_count from the existing selection
-            current_count = selection[0]["selection_count"] if selection else 0
-
-            # Increment selection_count and update the table
-            supabase.table("driver_selections").update({
-                "selection_count": current_count + 1
-            }).eq("username", username).eq("driver_code", selected_driver).execute()
-        else:
-            # Insert a new record if no selection exists
-            supabase.table("driver_selections").insert({
-                "username": username,
-                "driver_code": selected_driver,
-                "selection_count": 1
-            }).execute()
+        # Insert or update this round's pick in one write
+        supabase.table("selections").upsert({
+            "username": username,
+            "race_round": int(race_round),
+            "selected_driver": selected_driver,
+            "points": None  # Set points to None or update with actual points if available
+        }, on_conflict="username,race_round").execute()
+
+        # Let polling clients know about the new pick
+        changes.record(supabase, "selection", [{"username": username, "race_round": int(race_round), "selected_driver": selected_driver, "points": None}])
+
+        # Late picks for an already-scored round get points from the stored results, no API call
+        results.score_round_from_store(supabase, int(race_round))
+
+        # Counts changed, drop this player's cached usage
+        api_cache.invalidate(driver_usage_key(username))
+
+        # The pick reset this round's points, so refresh this player's leaderboard row
+        leaderboard.refresh_users(supabase, [username])
 
         return redirect(url_for('home'))
 
-    # Fetch available drivers for the season
-    drivers = fetch_drivers()
-    # Fetch the race schedule and find the race title
-    race = next((r for r in fetch_race_schedule() if int(r["round"]) == int(race_round)), None)
-    race_title = race["title"] if race else "Unknown Race"
+    # Fetch available drivers for the season and the race schedule concurrently
+    drivers, race_schedule = fanout.gather(fetch_drivers, fetch_schedule_model)
+    # Find the race title
+    race = race_schedule.by_round.get(int(race_round))
+    race_title = race.title if race else "Unknown Race"
 
     return render_template('select_driver.html', username=username, race_round=race_round, race_title=race_title, drivers=drivers)
    
@@ -325,8 +290,11 @@ def scores_view():
     if "username" not in session:
         return redirect(url_for("login"))
 
-    # Fetch selections from Supabase
-    selections = supabase.table("selections").select("username, race_round, selected_driver, points").execute().data
+    # Fetch selections from Supabase and the race schedule concurrently
+    selections, races = fanout.gather(
+        lambda: supabase.table("selections").select("username, race_round, selected_driver, points").execute().data,
+        fetch_race_schedule,
+    )
 
     # Sort selections by race round numerically
     selections.sort(key=lambda x: x['race_round'])
@@ -346,8 +314,6 @@ def scores_view():
         })
         if points is not None:
             user_data[username]["total_points"] += points
-    # Fetch race schedule (you could adjust this to your actual race fetching method)
-    races = fetch_race_schedule()  # Adjust to your fetching logic
 
     return render_template("scores.html", user_data=user_data, races=races)
 
@@ -357,31 +323,49 @@ def chart_data():
     if "username" not in session:
         return jsonify({"error": "Unauthorized"}), 401
 
-    # Fetch data from Supabase
-    selections = supabase.table("selections").select("username, race_round, points").execute().data
+    # Cumulative series are precomputed in the leaderboard table each time a round is scored
+    rows = leaderboard.load(supabase)
+    if request.args.get("format") == "columnar":
+        response = jsonify(leaderboard.columnar_series(rows))
+    else:
+        response = jsonify(leaderboard.chart_series(rows))
 
-    # Process data into a dictionary
-    user_scores = {}
-    for row in selections:
-        username, race_round, points = row["username"], row["race_round"], row["points"]
-        if username not in user_scores:
-            user_scores[username] = []
+    # Let browsers revalidate with If-None-Match/If-Modified-Since and get a 304 back
+    response.set_etag(hashlib.sha256(response.get_data()).hexdigest())
+    response.last_modified = leaderboard.last_updated(rows)
+    response.cache_control.no_cache = True
+    response.cache_control.private = True
+    return response.make_conditional(request)
 
-        user_scores[username].append({"race_round": race_round, "points": points or 0})  # Use 0 if points are None
 
-    # Sort each user's data by race_round and calculate cumulative points
-    for username, data in user_scores.items():
-        sorted_data = sorted(data, key=lambda x: x["race_round"])
-        cumulative_points = 0
-        race_rounds = []
-        points = []
-        for entry in sorted_data:
-            cumulative_points += entry["points"]
-            race_rounds.append(entry["race_round"])
-            points.append(cumulative_points)
-        user_scores[username] = {"race_rounds": race_rounds, "points": points}
+@app.route('/changes')
+def changes_feed():
+    if "username" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    # Without ?since= just report the current season version to start polling from
+    version = request.args.get("since", type=int)
+    if version is None:
+        return jsonify({"version": changes.current_version(supabase)})
+    return jsonify(changes.since(supabase, version))
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    if "username" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    # Hit/miss counters for the shared API cache, summed across all workers
+    return jsonify(api_cache.stats())
+
+
+@app.route('/http_stats')
+def http_stats():
+    if "username" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
 
-    return jsonify(user_scores)
+    # Per-host latency histograms of outbound calls made by this worker
+    return jsonify(http_client.latency_stats())
 
 
 
@@ -394,11 +378,19 @@ if __name__ == '__main__':
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='Fantasy F1 App')
     parser.add_argument('--reset-db', action='store_true', help='Reset the database')
+    parser.add_argument('--rebuild-leaderboard', action='store_true', help='Recompute the leaderboard table from the selections')
+    parser.add_argument('--dry-run', action='store_true', help='With --reset-db, only report what would be written')
+    parser.add_argument('--chunk-size', type=int, default=RESET_CHUNK_SIZE, help='Rows per bulk insert with --reset-db')
     args = parser.parse_args()
 
     # Call reset_database only if --reset-db is provided
     if args.reset_db:
-        reset_database()
+        reset_database(dry_run=args.dry_run, chunk_size=args.chunk_size)
+        if args.dry_run:
+            raise SystemExit(0)
+    elif args.rebuild_leaderboard:
+        leaderboard.rebuild(supabase, USERS_DB.keys())
+        print("Leaderboard rebuilt.")
     else:
         print("Starting app without resetting the database...")
 
@@ -0,0 +1,10 @@
+import importlib
+import os
+
+from a2wsgi import WSGIMiddleware
+
+# ASGI entry point, e.g.:  APP_MODULE=app25 uvicorn asgi:app --workers 4 --port 8000
+# Views fan their external calls out concurrently (fanout.py) in both this mode and
+# the gunicorn sync-worker setup from the Procfile.
+flask_app = importlib.import_module(os.getenv("APP_MODULE", "app3")).app
+app = WSGIMiddleware(flask_app, workers=int(os.getenv("ASGI_THREADS", "16")))
@@ -0,0 +1,172 @@
+"""End-to-end benchmark of app3/app25 with no network and no Supabase.
+
+The app runs on a local threaded server, talks to a fake Jolpica (fake_jolpica.py, which
+serves recorded responses from the replay store when there are any, --synthetic to skip
+them) and stores everything in an in-memory SQLite database (storage.SQLiteClient). Each
+scenario drives concurrent logged-in players and reports latency percentiles, throughput
+and the outbound Jolpica calls and DB queries per request (read from the Server-Timing header).
+
+Run from the repo root:  python benchmarks/bench_app.py --app app25 --concurrency 16
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_jolpica import FakeJolpica, driver_codes  # noqa: E402
+import replay_store  # noqa: E402
+from load_test import percentile  # noqa: E402
+
+SERVER_TIMING_CALLS = re.compile(r'(\w+);dur=[\d.]+;desc="(\d+) calls"')
+
+
+# Scenarios: what one player does in a loop, as (method, path, form data)
+def pick_rush(race_round, rng):
+    """Race weekend: open the picker, save a pick, land back on the home page."""
+    return [
+        ("GET", f"/select_driver?race_round={race_round}", None),
+        ("POST", f"/select_driver?race_round={race_round}", {"driver": rng.choice(driver_codes())}),
+        ("GET", "/", None),
+    ]
+
+
+def leaderboard_refresh(race_round, rng):
+    """After a race: everybody reloads the standings."""
+    return [("GET", "/", None), ("GET", "/scores", None), ("GET", "/chart_data", None)]
+
+
+def mixed(race_round, rng):
+    return (pick_rush if rng.random() < 0.3 else leaderboard_refresh)(race_round, rng)
+
+
+SCENARIOS = {"pick-rush": pick_rush, "leaderboard": leaderboard_refresh, "mixed": mixed}
+
+
+def start_app(app_module):
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def login(base_url, user):
+    session = requests.Session()
+    response = session.post(f"{base_url}/login", data={"username": user["username"], "password": user["password"]}, allow_redirects=False)
+    response.raise_for_status()
+    return session
+
+
+def run_scenario(base_url, users, scenario, race_round, concurrency, total, seed):
+    samples = defaultdict(list)  # endpoint -> [(ms, ok, http calls, db queries)]
+    lock = threading.Lock()
+    remaining = [total]
+
+    def player(index):
+        rng = random.Random(seed + index)
+        session = login(base_url, users[index % len(users)])
+        while True:
+            for method, path, form in scenario(race_round, rng):
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, f"{base_url}{path}", data=form, allow_redirects=False)
+                    ok = response.status_code < 400
+                    calls = dict((name, int(n)) for name, n in SERVER_TIMING_CALLS.findall(response.headers.get("Server-Timing", "")))
+                except requests.RequestException:
+                    ok, calls = False, {}
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with lock:
+                    samples[f"{method} {path.split('?')[0]}"].append((elapsed_ms, ok, calls.get("http", 0), calls.get("db", 0)))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(player, range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def report(name, samples, wall, outbound):
+    count = sum(len(rows) for rows in samples.values())
+    print(f"\n{name}: {count} requests in {wall:.1f}s, {count / wall:.1f} req/s, {outbound} Jolpica calls")
+    print(f"{'endpoint':<22} {'n':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'http/req':>9} {'db/req':>7}")
+    for endpoint, rows in sorted(samples.items()):
+        times = [row[0] for row in rows]
+        errors = sum(1 for row in rows if not row[1])
+        http_calls = sum(row[2] for row in rows) / len(rows)
+        db_queries = sum(row[3] for row in rows) / len(rows)
+        print(f"{endpoint:<22} {len(rows):>5} {errors:>4} {percentile(times, 50):>8.1f} {percentile(times, 95):>8.1f} "
+              f"{percentile(times, 99):>8.1f} {http_calls:>9.2f} {db_queries:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="app25", help="app module to benchmark (app3 or app25)")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--concurrency", type=int, default=8, help="players hitting the app at once")
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated Jolpica response time")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--synthetic", action="store_true", help="ignore recorded responses in the replay store")
+    args = parser.parse_args()
+
+    jolpica = FakeJolpica(latency_ms=args.latency_ms, replay_dir=None if args.synthetic else os.path.join(ROOT, replay_store.STORE_DIR)).start()
+    cache_dir = tempfile.mkdtemp(prefix="fantasyf1-bench-")
+    os.environ.update({
+        "STORAGE_BACKEND": "sqlite",
+        "STORAGE_PATH": ":memory:",
+        "API_CACHE_PATH": os.path.join(cache_dir, "api_cache.db"),
+        "HTTP_BASE_URL_OVERRIDES": f"https://api.jolpi.ca={jolpica.base_url}",
+    })
+    os.chdir(ROOT)
+
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):  # The apps log a line per request
+        app_module = importlib.import_module(args.app)
+        import results
+
+        app_module.reset_database()
+        races = app_module.fetch_race_schedule()
+        results.ingest_completed_rounds(app_module.supabase, app_module.YEAR, races)
+    today = date.today().isoformat()
+    race_round = next(int(race["round"]) for race in races if race["date"] >= today)
+    users = list(app_module.USERS_DB.values())
+    server, base_url = start_app(app_module)
+    print(f"{args.app}: {len(users)} players, {len(races)} rounds, picking round {race_round}, "
+          f"Jolpica latency {args.latency_ms:.0f} ms, concurrency {args.concurrency}")
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    for name in names:
+        before = jolpica.total_calls()
+        with contextlib.redirect_stdout(quiet):
+            samples, wall = run_scenario(base_url, users, SCENARIOS[name], race_round, args.concurrency, args.requests, args.seed)
+        quiet.seek(0)
+        quiet.truncate()
+        report(name, samples, wall, jolpica.total_calls() - before)
+
+    server.shutdown()
+    jolpica.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Count Supabase round trips per home page view, before and after batching.
+
+Run from the repo root:  python benchmarks/bench_home_queries.py --app app25
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+import types
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_supabase import FakeClient  # noqa: E402
+
+
+def install_fake_supabase(client):
+    """Make `from supabase.client import create_client` hand out our fake client."""
+    package = types.ModuleType("supabase")
+    module = types.ModuleType("supabase.client")
+    module.create_client = lambda url, key: client
+    module.Client = FakeClient
+    package.client = module
+    sys.modules["supabase"] = package
+    sys.modules["supabase.client"] = module
+
+
+def make_schedule(rounds):
+    """A season of `rounds` races, half already run and half still to come."""
+    start = date.today() - timedelta(weeks=rounds // 2)
+    return [
+        {"round": str(i + 1), "date": (start + timedelta(weeks=i)).isoformat(), "title": f"Grand Prix {i + 1}"}
+        for i in range(rounds)
+    ]
+
+
+def schedule_model(schedule):
+    """The same season as the parsed model home() uses (see schedule.py)."""
+    import schedule as schedule_module
+
+    races = [{"round": race["round"], "date": race["date"], "raceName": race["title"]} for race in schedule]
+    return schedule_module.from_jolpica("bench", {"MRData": {"RaceTable": {"Races": races}}})
+
+
+def seed(client, users, schedule):
+    today = date.today().isoformat()
+    client.tables["selections"] = [
+        {
+            "username": user,
+            "race_round": int(race["round"]),
+            "selected_driver": "VER" if race["date"] < today else None,
+            "points": 25 if race["date"] < today else None,
+        }
+        for user in users
+        for race in schedule
+    ]
+
+
+def legacy_home_queries(client, username, schedule, app_name):
+    """The query pattern home() used before batching: one read per round plus scans."""
+    for race in schedule:
+        client.table("selections").select("selected_driver, points").eq("username", username).eq("race_round", race["round"]).execute()
+    client.table("selections").select("username", "points").execute()
+    if app_name == "app3":
+        client.table("selections").select("*").execute()  # print_database_contents() ran on every view
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Supabase calls made by home()")
+    parser.add_argument("--app", default="app25", help="App module to benchmark (app3 or app25)")
+    parser.add_argument("--requests", type=int, default=50, help="Page views per measurement")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    client = FakeClient()
+    install_fake_supabase(client)
+    app_module = importlib.import_module(args.app)
+    username = next(iter(app_module.USERS_DB))
+
+    print(f"{'rounds':>6} {'before calls':>13} {'after calls':>12} {'ms/view':>8}")
+    for rounds in (12, 24, 48):
+        schedule = make_schedule(rounds)
+        seed(client, app_module.USERS_DB.keys(), schedule)
+        app_module.fetch_race_schedule = lambda: [dict(race) for race in schedule]
+        app_module.fetch_schedule_model = lambda model=schedule_model(schedule): model  # What home() reads
+
+        client.reset_calls()
+        for _ in range(args.requests):
+            legacy_home_queries(client, username, schedule, args.app)
+        before_calls = client.total_calls() / args.requests
+
+        test_client = app_module.app.test_client()
+        with test_client.session_transaction() as flask_session:
+            flask_session["username"] = username
+        client.reset_calls()
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            response = test_client.get("/")
+            assert response.status_code == 200, response.status_code
+        after_ms = (time.perf_counter() - started) * 1000 / args.requests
+        after_calls = client.total_calls() / args.requests
+
+        print(f"{rounds:>6} {before_calls:>13.0f} {after_calls:>12.0f} {after_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
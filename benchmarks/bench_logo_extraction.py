@@ -0,0 +1,108 @@
+"""Compare the streaming infobox-image extractor with a full BeautifulSoup parse.
+
+Saved Wikipedia articles live in benchmarks/fixtures/wikipedia/ (git-ignored). Missing
+ones are downloaded on the first run, after that the benchmark works offline.
+
+Run from the repo root:  python benchmarks/bench_logo_extraction.py --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# constructor_utils builds a Supabase client at import time; the extractor doesn't need it
+if "supabase.client" not in sys.modules:
+    module = types.ModuleType("supabase.client")
+    module.create_client = lambda url, key: None
+    module.Client = object
+    sys.modules["supabase"] = types.ModuleType("supabase")
+    sys.modules["supabase.client"] = module
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import constructor_utils  # noqa: E402
+import http_client  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "wikipedia")
+
+ARTICLES = [
+    "Red_Bull_Racing",
+    "McLaren",
+    "Scuderia_Ferrari",
+    "Mercedes-AMG_Petronas_F1_Team",
+    "Aston_Martin_in_Formula_One",
+    "Alpine_F1_Team",
+    "Williams_Racing",
+    "Racing_Bulls",
+    "Sauber_Motorsport",
+    "Haas_F1_Team",
+]
+
+
+def load_fixtures(articles):
+    """Return {article: html bytes}, downloading articles that aren't saved yet."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    pages = {}
+    for article in articles:
+        path = os.path.join(FIXTURE_DIR, f"{article}.html")
+        if not os.path.exists(path):
+            print(f"Recording {article}...")
+            response = http_client.get(f"https://en.wikipedia.org/wiki/{article}")
+            response.raise_for_status()
+            with open(path, "wb") as f:
+                f.write(response.content)
+        with open(path, "rb") as f:
+            pages[article] = f.read()
+    return pages
+
+
+def chunked(html, size, counter):
+    for start in range(0, len(html), size):
+        chunk = html[start:start + size]
+        counter[0] += len(chunk)
+        yield chunk
+
+
+def full_parse(html):
+    img = BeautifulSoup(html.decode("utf-8", "replace"), "html.parser").select_one("table.infobox img")
+    return img["src"] if img else None
+
+
+def streaming_parse(html, counter):
+    return constructor_utils.extract_infobox_image(chunked(html, constructor_utils.LOGO_CHUNK_SIZE, counter))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="parses per article and method")
+    parser.add_argument("articles", nargs="*", default=ARTICLES, help="Wikipedia article names")
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.articles)
+    print(f"{'article':32} {'size':>9} {'read':>9} {'bs4 ms':>8} {'stream ms':>10}  same")
+    totals = [0, 0, 0.0, 0.0]
+    for article, html in pages.items():
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            expected = full_parse(html)
+        full_ms = (time.perf_counter() - started) * 1000 / args.repeat
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            counter = [0]
+            found = streaming_parse(html, counter)
+        stream_ms = (time.perf_counter() - started) * 1000 / args.repeat
+
+        print(f"{article:32} {len(html):9} {counter[0]:9} {full_ms:8.1f} {stream_ms:10.1f}  {found == expected}")
+        for i, value in enumerate((len(html), counter[0], full_ms, stream_ms)):
+            totals[i] += value
+
+    print(f"{'total':32} {totals[0]:9} {totals[1]:9} {totals[2]:8.1f} {totals[3]:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""A local stand-in for api.jolpi.ca serving a synthetic (or recorded) season.
+
+Responses come from the replay store (replay_store.py) when it holds a recording of the
+URL, e.g. after  HTTP_REPLAY_MODE=record  or  python replay_store.py --season 2025,
+otherwise from a deterministic synthetic season whose first half has already been raced.
+Every request is counted per path.
+
+Point the apps at it with HTTP_BASE_URL_OVERRIDES="https://api.jolpi.ca=<server.base_url>".
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import replay_store  # noqa: E402
+
+JOLPICA = "https://api.jolpi.ca"
+
+DRIVERS = [
+    ("max_verstappen", "VER", "Max", "Verstappen"), ("tsunoda", "TSU", "Yuki", "Tsunoda"),
+    ("norris", "NOR", "Lando", "Norris"), ("piastri", "PIA", "Oscar", "Piastri"),
+    ("leclerc", "LEC", "Charles", "Leclerc"), ("hamilton", "HAM", "Lewis", "Hamilton"),
+    ("russell", "RUS", "George", "Russell"), ("antonelli", "ANT", "Andrea Kimi", "Antonelli"),
+    ("alonso", "ALO", "Fernando", "Alonso"), ("stroll", "STR", "Lance", "Stroll"),
+    ("gasly", "GAS", "Pierre", "Gasly"), ("colapinto", "COL", "Franco", "Colapinto"),
+    ("albon", "ALB", "Alexander", "Albon"), ("sainz", "SAI", "Carlos", "Sainz"),
+    ("hadjar", "HAD", "Isack", "Hadjar"), ("lawson", "LAW", "Liam", "Lawson"),
+    ("hulkenberg", "HUL", "Nico", "Hülkenberg"), ("bortoleto", "BOR", "Gabriel", "Bortoleto"),
+    ("ocon", "OCO", "Esteban", "Ocon"), ("bearman", "BEA", "Oliver", "Bearman"),
+]
+
+
+def driver_codes():
+    return [code for _, code, _, _ in DRIVERS]
+
+
+def _schedule(rounds):
+    start = date.today() - timedelta(weeks=rounds // 2)
+    return [(i + 1, start + timedelta(weeks=i)) for i in range(rounds)]
+
+
+def _driver(driver_id, code, given, family):
+    return {"driverId": driver_id, "code": code, "givenName": given, "familyName": family}
+
+
+def paginate(data, limit, offset):
+    """Apply ?limit=&offset= to a season results document, counting individual results."""
+    rows = [(race, result) for race in data["MRData"]["RaceTable"]["Races"] for result in race["Results"]]
+    races = {}
+    for race, result in rows[offset:offset + limit]:
+        races.setdefault(race["round"], {**race, "Results": []})["Results"].append(result)
+    data["MRData"].update({"limit": str(limit), "offset": str(offset), "total": str(len(rows))})
+    data["MRData"]["RaceTable"]["Races"] = list(races.values())
+    return data
+
+
+def synthetic_response(path, rounds=24):
+    """Build the JSON body for an Ergast-style path, or None for an unknown path."""
+    match = re.fullmatch(r"/ergast/f1/(\d{4})(?:/(.*))?\.json", path)
+    if not match:
+        return None
+    year, rest = match.group(1), match.group(2)
+    schedule = _schedule(rounds)
+
+    if rest is None:
+        races = [{"season": year, "round": str(r), "raceName": f"Grand Prix {r}", "date": d.isoformat()} for r, d in schedule]
+        return {"MRData": {"RaceTable": {"season": year, "Races": races}}}
+
+    if rest == "drivers":
+        return {"MRData": {"DriverTable": {"season": year, "Drivers": [_driver(*d) for d in DRIVERS]}}}
+
+    results = re.fullmatch(r"(\d+)/results", rest)
+    if results:
+        race_round = int(results.group(1))
+        races = []
+        if race_round <= rounds and schedule[race_round - 1][1] < date.today():
+            order = list(DRIVERS)
+            random.Random(race_round).shuffle(order)
+            races = [{
+                "round": str(race_round),
+                "Results": [{"position": str(i + 1), "Driver": _driver(*d)} for i, d in enumerate(order)],
+            }]
+        return {"MRData": {"RaceTable": {"season": year, "round": str(race_round), "Races": races}}}
+
+    if rest == "results":
+        # The whole season's results, paged by result rows like the real API (see body())
+        races = [synthetic_response(f"/ergast/f1/{year}/{r}/results.json", rounds)["MRData"]["RaceTable"]["Races"] for r, _ in schedule]
+        return {"MRData": {"RaceTable": {"season": year, "Races": [race for found in races for race in found]}}}
+
+    if rest == "driverStandings":
+        standings = [{
+            "position": str(i + 1),
+            "Driver": _driver(*d),
+            "Constructors": [{"constructorId": f"team_{i // 2}", "name": f"Team {i // 2}", "url": f"http://en.wikipedia.org/wiki/Team_{i // 2}"}],
+        } for i, d in enumerate(DRIVERS)]
+        return {"MRData": {"StandingsTable": {"season": year, "StandingsLists": [{"DriverStandings": standings}]}}}
+    return None
+
+
+class FakeJolpica:
+    """Threaded HTTP server on 127.0.0.1 with optional per-request latency."""
+
+    def __init__(self, latency_ms=50, rounds=24, replay_dir=replay_store.STORE_DIR):
+        self.latency_ms = latency_ms
+        self.rounds = rounds
+        self.replay_dir = replay_dir  # None serves the synthetic season only
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                with server._lock:
+                    server.calls[path] += 1
+                time.sleep(server.latency_ms / 1000)
+                body = server.body(path, query)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def recorded(self, path):
+        """The recorded JSON for a path (query strings aren't recorded), or None."""
+        entry = replay_store.read_entry(JOLPICA + path, self.replay_dir) if self.replay_dir else None
+        return json.loads(entry["body"]) if entry else None
+
+    def body(self, path, query=""):
+        data = self.recorded(path)
+        if data is None:
+            data = synthetic_response(path, self.rounds)
+        if data is None:
+            return None
+        if path.endswith("/results.json") and path.count("/") == 4:
+            params = dict(parse_qsl(query))
+            data = paginate(data, int(params.get("limit", 30)), int(params.get("offset", 0)))
+        return json.dumps(data).encode()
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
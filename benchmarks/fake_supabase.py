@@ -0,0 +1,138 @@
+"""In-memory stand-in for the supabase-py client that counts remote calls."""
+import copy
+from collections import Counter
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.action = "select"
+        self.columns = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.order_by = None
+
+    # Builders
+    def select(self, *columns, **kwargs):
+        self.action = "select"
+        names = []
+        for column in columns:
+            names.extend(c.strip() for c in column.split(","))
+        self.columns = None if names == ["*"] else names
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **kwargs):
+        self.action, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # Filters
+    def eq(self, column, value):
+        self.filters.append(lambda row: _same(row.get(column), value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: not _same(row.get(column), value))
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(lambda row: any(_same(row.get(column), v) for v in values))
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(lambda row: row.get(column) is None if value in (None, "null") else row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by = (column, desc)
+        return self
+
+    def _matches(self, row):
+        return all(f(row) for f in self.filters)
+
+    def execute(self):
+        self.client.calls[(self.table_name, self.action)] += 1
+        rows = self.client.tables.setdefault(self.table_name, [])
+
+        if self.action == "select":
+            result = [row for row in rows if self._matches(row)]
+            if self.order_by:
+                column, desc = self.order_by
+                result.sort(key=lambda row: row.get(column), reverse=desc)
+            if self.columns:
+                result = [{c: row.get(c) for c in self.columns} for row in result]
+            return FakeResponse(copy.deepcopy(result))
+
+        if self.action == "insert":
+            new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            rows.extend(copy.deepcopy(new_rows))
+            return FakeResponse(copy.deepcopy(new_rows))
+
+        if self.action == "upsert":
+            new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            keys = [k.strip() for k in self.on_conflict.split(",")] if self.on_conflict else ["id"]
+            for new_row in new_rows:
+                existing = None
+                if all(new_row.get(k) is not None for k in keys):
+                    existing = next((r for r in rows if all(_same(r.get(k), new_row.get(k)) for k in keys)), None)
+                if existing is None:
+                    rows.append(copy.deepcopy(new_row))
+                else:
+                    existing.update(copy.deepcopy(new_row))
+            return FakeResponse(copy.deepcopy(new_rows))
+
+        if self.action == "update":
+            updated = [row for row in rows if self._matches(row)]
+            for row in updated:
+                row.update(self.payload)
+            return FakeResponse(copy.deepcopy(updated))
+
+        if self.action == "delete":
+            deleted = [row for row in rows if self._matches(row)]
+            self.client.tables[self.table_name] = [row for row in rows if not self._matches(row)]
+            return FakeResponse(deleted)
+
+        raise ValueError(f"Unsupported action {self.action}")
+
+
+def _same(a, b):
+    # PostgREST compares through the query string, so 5 and "5" match
+    return a == b or (a is not None and b is not None and str(a) == str(b))
+
+
+class FakeClient:
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+        self.calls = Counter()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def reset_calls(self):
+        self.calls.clear()
@@ -0,0 +1,80 @@
+"""Hammer a running Fantasy F1 server and report latency percentiles per endpoint.
+
+Compare the two serving modes by starting each one and pointing this script at it:
+
+    gunicorn -w 4 -b 0.0.0.0:8000 app25:app                    (sync workers, Procfile)
+    APP_MODULE=app25 uvicorn asgi:app --workers 4 --port 8000   (ASGI)
+
+    python benchmarks/load_test.py --base-url http://127.0.0.1:8000 --username Ben --password Kohane
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def login(base_url, username, password):
+    session = requests.Session()
+    response = session.post(f"{base_url}/login", data={"username": username, "password": password}, allow_redirects=False)
+    if response.status_code != 302:
+        raise SystemExit(f"Login failed with status {response.status_code}")
+    return session
+
+
+def run(base_url, paths, username, password, concurrency, total):
+    local = threading.local()
+    timings = {path: [] for path in paths}
+    errors = {path: 0 for path in paths}
+    lock = threading.Lock()
+
+    def one(i):
+        if not hasattr(local, "session"):
+            local.session = login(base_url, username, password)
+        path = paths[i % len(paths)]
+        started = time.perf_counter()
+        try:
+            ok = local.session.get(f"{base_url}{path}").status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            timings[path].append(elapsed_ms)
+            if not ok:
+                errors[path] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    print(f"{total} requests, concurrency {concurrency}, {total / wall:.1f} req/s overall")
+    print(f"{'endpoint':<28} {'n':>5} {'err':>4} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for path, samples in timings.items():
+        if samples:
+            print(f"{path:<28} {len(samples):>5} {errors[path]:>4} {statistics.mean(samples):>8.1f} "
+                  f"{percentile(samples, 50):>8.1f} {percentile(samples, 95):>8.1f} {percentile(samples, 99):>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running Fantasy F1 server")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--paths", nargs="+", default=["/", "/select_driver?race_round=24", "/scores"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    args = parser.parse_args()
+    run(args.base_url.rstrip("/"), args.paths, args.username, args.password, args.concurrency, args.requests)
+
+
+if __name__ == "__main__":
+    main()
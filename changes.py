@@ -0,0 +1,60 @@
+from datetime import datetime
+
+# Change feed for polling clients (GET /changes?since=N). Picks, scoring passes and
+# leaderboard refreshes append rows to change_log, whose version is the season version.
+# A client keeps the last version it has seen and only downloads what changed after it
+# instead of the whole scores table and every chart series. Versions must become visible
+# in order or a client could skip one: in Supabase they come from a counter row locked
+# until commit (see the change_log_version migration); SQLite commits one writer at a time.
+FEED_LIMIT = 500  # Log rows read per poll; clients call again while "more" is true
+
+
+def record(client, kind, rows):
+    """Append one change_log entry per row (kind: "selection", "leaderboard" or "reset")."""
+    if not rows:
+        return
+    now = datetime.now().isoformat()
+    client.table("change_log").insert([
+        {"kind": kind, "username": row.get("username"), "race_round": row.get("race_round"), "payload": row, "created_at": now}
+        for row in rows
+    ]).execute()
+
+
+def record_reset(client):
+    """Tell clients to reload everything (the season was wiped and prefilled again)."""
+    record(client, "reset", [{}])
+
+
+def current_version(client):
+    rows = client.table("change_log").select("version").order("version", desc=True).limit(1).execute().data
+    return rows[0]["version"] if rows else 0
+
+
+def since(client, version, limit=FEED_LIMIT):
+    """Changes after version, only the latest one per record.
+
+    Returns {"version": ..., "reset": bool, "more": bool, "selections": [...], "leaderboard": [...]}.
+    When "reset" is true the client should reload the full page instead of applying changes.
+    """
+    rows = client.table("change_log").select("*").gt("version", version).order("version").limit(limit + 1).execute().data
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    if not rows:
+        latest_version = current_version(client)
+        # A version from the future means the log was cleared, so the client's copy is stale
+        return {"version": latest_version, "reset": version > latest_version, "more": False, "selections": [], "leaderboard": []}
+
+    if any(row["kind"] == "reset" for row in rows):
+        return {"version": rows[-1]["version"], "reset": True, "more": more, "selections": [], "leaderboard": []}
+
+    latest = {}
+    for row in rows:
+        latest[(row["kind"], row["username"], row["race_round"])] = row["payload"]
+    return {
+        "version": rows[-1]["version"],
+        "reset": False,
+        "more": more,
+        "selections": [payload for (kind, _, _), payload in latest.items() if kind == "selection"],
+        "leaderboard": [payload for (kind, _, _), payload in latest.items() if kind == "leaderboard"],
+    }
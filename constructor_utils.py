@@ -1,7 +1,11 @@
+import codecs
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import requests
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+import fanout
+import http_client
 from supabase.client import create_client, Client
 import os
 from dotenv import load_dotenv
@@ -14,14 +18,36 @@ url = os.getenv("supabaseURL")  # Replace with your project URL**
 key = os.getenv("supabaseKEY")  # Replace with your public anon key**
 supabase: Client = create_client(url, key)  # Initialize Supabase client
 
-CACHE_EXPIRY = timedelta(days=30)  # Cache duration
+CACHE_EXPIRY = timedelta(days=30)  # Cache duration (older entries are served while they refresh)
+LRU_SIZE = 256  # Constructor entries kept in memory per worker
+
+# In-process LRU in front of the constructors table: (driver_id, season) -> (team, last_updated)
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+_refreshing = set()  # (driver_id, season) pairs with a background refresh in flight
+
+
+def _lru_get(driver_id, year):
+    with _lru_lock:
+        entry = _lru.get((driver_id, year))
+        if entry is not None:
+            _lru.move_to_end((driver_id, year))
+        return entry
+
+
+def _lru_put(driver_id, year, team, last_updated):
+    with _lru_lock:
+        _lru[(driver_id, year)] = (team, last_updated)
+        _lru.move_to_end((driver_id, year))
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
 
 
 # Fetch constructor (team) info for a driver in a specific season
 def fetch_constructor(driver_id, year):
     constructor_url = f"https://api.jolpi.ca/ergast/f1/{year}/drivers/{driver_id}/constructors.json"
     try:
-        response = requests.get(constructor_url)
+        response = http_client.get(constructor_url)
         response.raise_for_status()
         constructor_data = response.json()
 
@@ -36,18 +62,51 @@ def fetch_constructor(driver_id, year):
         return {"name": "Unknown", "wikipedia_url": None}
 
 
-# Fetch team logo from Wikipedia
+# Finds the first <img> inside the infobox table while the page is still downloading
+class _InfoboxImageParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.infobox_depth = 0  # Tables opened since (and including) the infobox
+        self.src = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.src is not None:
+            return
+        if tag == "table":
+            if self.infobox_depth or "infobox" in (dict(attrs).get("class") or "").split():
+                self.infobox_depth += 1
+        elif tag == "img" and self.infobox_depth:
+            self.src = dict(attrs).get("src")
+
+    def handle_endtag(self, tag):
+        if tag == "table" and self.infobox_depth:
+            self.infobox_depth -= 1
+
+
+LOGO_CHUNK_SIZE = 16 * 1024  # Bytes fed to the parser at a time
+
+
+def extract_infobox_image(chunks):
+    """Return the src of the first infobox image in an HTML byte stream, reading no further than needed."""
+    parser = _InfoboxImageParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.src is not None:
+            break
+    return parser.src
+
+
+# Fetch team logo from Wikipedia, streaming the article and stopping at the infobox image
 def fetch_logo_from_wikipedia(wikipedia_url):
     if not wikipedia_url:
         return None
     try:
-        response = requests.get(wikipedia_url)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        logo_img = soup.select_one("table.infobox img")
-        if logo_img:
-            return "https:" + logo_img["src"]
+        with http_client.get(wikipedia_url, stream=True) as response:
+            response.raise_for_status()
+            src = extract_infobox_image(response.iter_content(chunk_size=LOGO_CHUNK_SIZE))
+        if src:
+            return "https:" + src if src.startswith("//") else src
         else:
             return None
     except Exception as e:
@@ -55,37 +114,126 @@ def fetch_logo_from_wikipedia(wikipedia_url):
         return None
 
 
-# Check cache and fetch team info
-def get_constructor_and_logo(driver_id, year):
-    # Check cache in Supabase
+# Map every driver of the season to their constructor with one request. Driver standings
+# list each driver's teams (current one last); before the first race they're empty, so any
+# driver missing from them falls back to the per-driver lookup above.
+def fetch_constructors_for_season(year, driver_ids=()):
+    standings_url = f"https://api.jolpi.ca/ergast/f1/{year}/driverStandings.json"
+    constructors = {}
     try:
-        result = supabase.table("constructors").select("*").eq("driver_id", driver_id).eq("season", year).execute().data
-        if result:
-            cached_entry = result[0]
-            last_updated = datetime.fromisoformat(cached_entry["last_updated"])
-            if datetime.now() - last_updated < CACHE_EXPIRY:
-                return {
-                    "team_name": cached_entry["team_name"],
-                    "team_logo": cached_entry["team_logo"],
-                }
-
-        # If not cached or expired, fetch fresh data
-        constructor = fetch_constructor(driver_id, year)
-        logo = fetch_logo_from_wikipedia(constructor["wikipedia_url"])
-
-        # Save to database
-        supabase.table("constructors").upsert({
+        response = http_client.get(standings_url)
+        response.raise_for_status()
+        lists = response.json()["MRData"]["StandingsTable"]["StandingsLists"]
+        for standing in (lists[-1]["DriverStandings"] if lists else []):
+            team = standing["Constructors"][-1]
+            constructors[standing["Driver"]["driverId"]] = {"name": team["name"], "wikipedia_url": team["url"]}
+    except Exception as e:
+        print(f"Error fetching driver standings for {year}: {e}")
+
+    missing = [driver_id for driver_id in driver_ids if driver_id not in constructors]
+    if missing:
+        fetched = fanout.gather(*[lambda d=driver_id: fetch_constructor(d, year) for driver_id in missing])
+        constructors.update(zip(missing, fetched))
+    return constructors
+
+
+# Fetch fresh team info for these drivers: one Jolpica call for the whole grid and one logo
+# download per team (run concurrently), saved to the cache table in one request
+def refresh_constructors(driver_ids, year):
+    constructors = fetch_constructors_for_season(year, driver_ids)
+    unknown = {"name": "Unknown", "wikipedia_url": None}
+
+    # Team mates share a page, so each logo is only fetched once
+    pages = list(dict.fromkeys(constructors.get(d, unknown)["wikipedia_url"] for d in driver_ids))
+    logos = dict(zip(pages, fanout.gather(*[lambda p=page: fetch_logo_from_wikipedia(p) for page in pages])))
+
+    now = datetime.now()
+    teams = {}
+    rows = []
+    for driver_id in driver_ids:
+        constructor = constructors.get(driver_id, unknown)
+        teams[driver_id] = {"team_name": constructor["name"], "team_logo": logos[constructor["wikipedia_url"]]}
+        if constructor["name"] == "Unknown" or teams[driver_id]["team_logo"] is None:
+            continue  # Failed lookup: keep whatever we had cached and try again next time
+        _lru_put(driver_id, year, teams[driver_id], now)
+        rows.append({
             "driver_id": driver_id,
             "team_name": constructor["name"],
-            "team_logo": logo,
+            "team_logo": logos[constructor["wikipedia_url"]],
             "season": year,
-            "last_updated": datetime.now().isoformat(),
-        }).execute()
+            "last_updated": now.isoformat(),
+        })
 
-        return {
-            "team_name": constructor["name"],
-            "team_logo": logo,
-        }
+    # Save to database in one request
+    try:
+        if rows:
+            supabase.table("constructors").upsert(rows, on_conflict="driver_id,season").execute()
     except Exception as e:
-        print(f"Error with constructor cache for {driver_id} in {year}: {e}")
-        return {"team_name": "Unknown", "team_logo": None}
+        print(f"Error saving constructor cache for {year}: {e}")
+    return teams
+
+
+def _refresh_in_background(driver_ids, year):
+    """Refresh expired entries on a daemon thread, at most once at a time per driver in this worker."""
+    with _lru_lock:
+        claimed = [d for d in driver_ids if (d, year) not in _refreshing]
+        _refreshing.update((d, year) for d in claimed)
+    if not claimed:
+        return
+
+    def run():
+        try:
+            refresh_constructors(claimed, year)
+        except Exception as e:
+            print(f"Error refreshing constructors for {year}: {e}")
+        finally:
+            with _lru_lock:
+                _refreshing.difference_update((d, year) for d in claimed)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+# Check cache and fetch team info for many drivers at once. Lookups go memory -> constructors
+# table -> Jolpica/Wikipedia; expired entries are returned straight away and refreshed in the
+# background, so only drivers we've never seen block on the network.
+def get_constructors_and_logos(driver_ids, year):
+    driver_ids = list(dict.fromkeys(driver_ids))
+    teams = {}
+    expired = []
+
+    def use(driver_id, team, last_updated):
+        teams[driver_id] = team
+        if datetime.now() - last_updated >= CACHE_EXPIRY:
+            expired.append(driver_id)
+
+    lookup = []
+    for driver_id in driver_ids:
+        entry = _lru_get(driver_id, year)
+        if entry is not None:
+            use(driver_id, *entry)
+        else:
+            lookup.append(driver_id)
+
+    if lookup:
+        try:
+            rows = supabase.table("constructors").select("*").in_("driver_id", lookup).eq("season", year).execute().data
+            for row in rows:
+                team = {"team_name": row["team_name"], "team_logo": row["team_logo"]}
+                last_updated = datetime.fromisoformat(row["last_updated"])
+                _lru_put(row["driver_id"], year, team, last_updated)
+                use(row["driver_id"], team, last_updated)
+        except Exception as e:
+            print(f"Error reading constructor cache for {year}: {e}")
+
+    if expired:
+        _refresh_in_background(expired, year)
+
+    missing = [driver_id for driver_id in driver_ids if driver_id not in teams]
+    if missing:
+        teams.update(refresh_constructors(missing, year))
+    return teams
+
+
+# Check cache and fetch team info for a single driver
+def get_constructor_and_logo(driver_id, year):
+    return get_constructors_and_logos([driver_id], year)[driver_id]
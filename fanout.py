@@ -0,0 +1,29 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Run a view's independent I/O (Jolpica fetches, Supabase queries) at the same time
+# instead of one after another. Works under gunicorn sync workers and under ASGI (asgi.py).
+MAX_WORKERS = int(os.getenv("FANOUT_WORKERS", "16"))
+
+_executor = None
+_executor_pid = None
+
+
+def _pool():
+    # One pool per process; threads don't survive a fork, so gunicorn workers build their own
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fanout")
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def gather(*calls):
+    """Run zero-argument callables concurrently and return their results in order.
+
+    Each call runs in a copy of the caller's context, so Flask's request, session and g
+    are available inside it. The first exception raised by any call is re-raised here.
+    """
+    futures = [_pool().submit(contextvars.copy_context().run, call) for call in calls]
+    return [future.result() for future in futures]
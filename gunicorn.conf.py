@@ -0,0 +1,18 @@
+import importlib
+import os
+
+# gunicorn settings used by the Procfile:  gunicorn -c gunicorn.conf.py --preload app3:app
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+preload_app = True  # Import the app (and warm it up) once in the master, then fork
+
+
+def when_ready(server):
+    # The master has loaded the app but not forked any worker yet
+    import warmup
+
+    module_name = server.app.app_uri.split(":", 1)[0]
+    try:
+        warmup.warm(importlib.import_module(module_name))
+    except Exception as e:
+        server.log.warning(f"Warm-up failed, workers will start cold: {e}")
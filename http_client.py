@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation
+import replay_store
+
+# Shared HTTP client for every outbound call (Jolpica, Wikipedia...): pooled keep-alive
+# connections, per-host connection limits, timeouts, retries with jitter and latency stats.
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+DEFAULT_POOL_SIZE = 4
+HOST_POOL_SIZES = {  # Max concurrent connections per host
+    "api.jolpi.ca": 4,
+    "en.wikipedia.org": 8,
+    "upload.wikimedia.org": 8,
+}
+LATENCY_BUCKETS_MS = [25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Send requests for a base URL somewhere else, e.g. to the fake Jolpica server used by the
+# benchmarks: HTTP_BASE_URL_OVERRIDES="https://api.jolpi.ca=http://127.0.0.1:8765"
+BASE_URL_OVERRIDES = dict(
+    pair.split("=", 1) for pair in os.getenv("HTTP_BASE_URL_OVERRIDES", "").split(",") if "=" in pair
+)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_latency = {}
+
+
+def _retry():
+    return Retry(
+        total=3,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the last response back so raise_for_status() reports it
+    )
+
+
+def _adapter(pool_size):
+    return HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=_retry())
+
+
+def _build_session():
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "FantasyF1/1.0"})
+    default = _adapter(DEFAULT_POOL_SIZE)
+    session.mount("https://", default)
+    session.mount("http://", default)
+    for host, pool_size in HOST_POOL_SIZES.items():
+        session.mount(f"https://{host}/", _adapter(pool_size))
+    return session
+
+
+def session():
+    """Return this process's shared session (rebuilt after a fork so sockets aren't shared)."""
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = _build_session()
+                _session_pid = os.getpid()
+    return _session
+
+
+def _record(host, elapsed_ms):
+    with _stats_lock:
+        stats = _latency.get(host)
+        if stats is None:
+            stats = _latency[host] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                stats["buckets"][i] += 1
+                break
+        else:
+            stats["buckets"][-1] += 1
+
+
+def get(url, **kwargs):
+    """requests.get() through the shared pooled session, with a default timeout."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    replay_url = url if replay_store.handles(url) and not kwargs.get("params") else None
+    if replay_url:
+        saved = replay_store.load(replay_url)
+        if saved is not None:
+            return saved
+
+    for base, replacement in BASE_URL_OVERRIDES.items():
+        if url.startswith(base):
+            url = replacement + url[len(base):]
+            break
+    host = urlsplit(url).hostname or "unknown"
+    started = time.perf_counter()
+    try:
+        response = session().get(url, **kwargs)
+        if replay_url and not kwargs.get("stream"):
+            replay_store.save(replay_url, response)
+        return response
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _record(host, elapsed_ms)
+        instrumentation.record("http", elapsed_ms)
+
+
+def latency_stats():
+    """Per-host latency histograms for this process, e.g. {"api.jolpi.ca": {...}}."""
+    labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    with _stats_lock:
+        return {
+            host: {
+                "count": stats["count"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "histogram": dict(zip(labels, stats["buckets"])),
+            }
+            for host, stats in _latency.items()
+        }
@@ -0,0 +1,52 @@
+import argparse
+import importlib
+import time
+
+import api_cache
+import results
+
+# Standalone results ingestion worker: scores completed rounds outside the web request path.
+# Usage:
+#   python ingest_results.py --app app25                   (one pass, e.g. from cron)
+#   python ingest_results.py --app app25 --loop --interval 900
+
+
+def run_once(app_module):
+    races = app_module.fetch_race_schedule()
+    if not races:
+        print("No race schedule available, skipping this pass.")
+        return []
+    return results.ingest_completed_rounds(app_module.supabase, app_module.YEAR, races)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Score completed Fantasy F1 rounds.")
+    parser.add_argument("--app", default="app3", help="App module whose season and database to use (app3 or app25)")
+    parser.add_argument("--loop", action="store_true", help="Keep polling instead of running a single pass")
+    parser.add_argument("--interval", type=int, default=900, help="Seconds between passes with --loop")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    app_module = importlib.import_module(args.app)  # Reuses the app's Supabase client, YEAR and schedule cache
+
+    while True:
+        try:
+            scored = run_once(app_module)
+            print(f"Ingestion pass complete, rounds scored: {scored or 'none'}")
+            # These counters live in this host's api_cache.db, not the web app's /cache_stats
+            counters = {name: value for name, value in api_cache.stats().items() if name.startswith("results_")}
+            print(f"Results counters: {counters}")
+        except Exception as e:
+            if not args.loop:
+                raise
+            # A transient database or API error must not stop the worker for good
+            print(f"Ingestion pass failed, retrying in {args.interval}s: {e}")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
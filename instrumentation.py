@@ -0,0 +1,119 @@
+import contextvars
+import cProfile
+import json
+import os
+import threading
+import time
+
+# Per-request timings: outbound HTTP (http_client), database (query_cache) and template
+# rendering. Each response gets a Server-Timing header (shown in the browser's network tab)
+# and one JSON log line. Set PROFILE_THRESHOLD_MS to also save a cProfile dump of every
+# request slower than that into PROFILE_DIR (open with `python -m pstats` or snakeviz).
+PROFILE_THRESHOLD_MS = float(os.getenv("PROFILE_THRESHOLD_MS", "0"))  # 0 = profiling off
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+_current = contextvars.ContextVar("request_timings", default=None)  # fanout threads see it too
+
+
+class Timings:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.phases = {}  # name -> [total ms, count]
+        self.render_started = None
+        self.profiler = None
+
+    def add(self, phase, elapsed_ms):
+        with self.lock:
+            total = self.phases.setdefault(phase, [0.0, 0])
+            total[0] += elapsed_ms
+            total[1] += 1
+
+
+def record(phase, elapsed_ms):
+    """Add elapsed_ms to a phase of the current request (no-op outside a request)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, elapsed_ms)
+
+
+def _start_profiler():
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # Another thread of this worker is already being profiled
+        return None
+    return profiler
+
+
+def _server_timing(phases, total_ms):
+    parts = [f'{name};dur={ms:.1f};desc="{count} calls"' for name, (ms, count) in sorted(phases.items())]
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def init_app(app):
+    """Register the timing hooks on a Flask app."""
+    from flask import before_render_template, request, template_rendered
+
+    import query_cache
+
+    @app.before_request
+    def start_timings():
+        timings = Timings()
+        if PROFILE_THRESHOLD_MS:
+            timings.profiler = _start_profiler()
+        _current.set(timings)
+
+    def render_started(sender, **extra):
+        timings = _current.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+
+    def render_finished(sender, **extra):
+        timings = _current.get()
+        if timings is not None and timings.render_started is not None:
+            timings.add("render", (time.perf_counter() - timings.render_started) * 1000)
+            timings.render_started = None
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.after_request
+    def report_timings(response):
+        timings = _current.get()
+        if timings is None:
+            return response
+        total_ms = (time.perf_counter() - timings.started) * 1000
+        db = query_cache.request_stats()
+        with timings.lock:
+            phases = {name: list(value) for name, value in timings.phases.items()}
+        if db["queries"]:
+            phases["db"] = [db["db_ms"], db["queries"]]
+
+        response.headers["Server-Timing"] = _server_timing(phases, total_ms)
+        print(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            **{f"{name}_ms": round(ms, 1) for name, (ms, _) in phases.items()},
+            "http_calls": phases.get("http", [0, 0])[1],
+            "db_queries": db["queries"],
+            "db_cached": db["cached"],
+        }))
+
+        if timings.profiler is not None:
+            timings.profiler.disable()
+            if total_ms >= PROFILE_THRESHOLD_MS:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                name = f"{request.path.strip('/').replace('/', '_') or 'home'}-{int(time.time() * 1000)}.prof"
+                timings.profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        return response
+
+    @app.teardown_request
+    def clear_timings(exc):
+        timings = _current.get()
+        if timings is not None and timings.profiler is not None:
+            timings.profiler.disable()  # The view raised before after_request ran
+        _current.set(None)
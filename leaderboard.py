@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import changes
+
+# Materialized leaderboard: one row per player with their total and per-round cumulative
+# points. Rows are rewritten whenever a round is scored or a pick changes, so reading the
+# leaderboard is a single O(players) query instead of a scan of every selection.
+
+
+def refresh_users(client, usernames):
+    """Recompute the leaderboard rows of the given players (one read, one upsert)."""
+    usernames = sorted(set(usernames))
+    if not usernames:
+        return []
+
+    selections = client.table("selections").select("username, race_round, points").in_("username", usernames).execute().data
+    by_user = {username: [] for username in usernames}
+    for row in selections:
+        by_user.setdefault(row["username"], []).append((int(row["race_round"]), row["points"] or 0))
+
+    now = datetime.now().isoformat()
+    rows = []
+    for username, picks in by_user.items():
+        race_rounds, cumulative_points, total = [], [], 0
+        for race_round, points in sorted(picks):
+            total += points
+            race_rounds.append(race_round)
+            cumulative_points.append(total)
+        rows.append({
+            "username": username,
+            "total_points": total,
+            "race_rounds": race_rounds,
+            "cumulative_points": cumulative_points,
+            "updated_at": now,
+        })
+
+    client.table("leaderboard").upsert(rows, on_conflict="username").execute()
+    changes.record(client, "leaderboard", rows)
+    return rows
+
+
+def rebuild(client, usernames):
+    """Throw away the leaderboard and rebuild it for every player."""
+    client.table("leaderboard").delete().neq("username", "").execute()
+    return refresh_users(client, usernames)
+
+
+def load(client):
+    """Return every leaderboard row."""
+    return client.table("leaderboard").select("*").execute().data
+
+
+def sorted_scores(client, all_users):
+    """Return [(username, total_points), ...] for all players, highest first."""
+    totals = {row["username"]: row["total_points"] for row in client.table("leaderboard").select("username, total_points").execute().data}
+    scores = {user: totals.get(user, 0) for user in all_users}
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def chart_series(rows):
+    """Per-player cumulative series: {username: {"race_rounds": [...], "points": [...]}}."""
+    return {row["username"]: {"race_rounds": row["race_rounds"], "points": row["cumulative_points"]} for row in rows}
+
+
+def columnar_series(rows):
+    """Compact form of chart_series(): one shared rounds array plus a points array per player."""
+    rounds = sorted({race_round for row in rows for race_round in row["race_rounds"]})
+    users = {}
+    for row in rows:
+        by_round = dict(zip(row["race_rounds"], row["cumulative_points"]))
+        points, total = [], 0
+        for race_round in rounds:
+            total = by_round.get(race_round, total)  # Carry the running total over missing rounds
+            points.append(total)
+        users[row["username"]] = points
+    return {"rounds": rounds, "users": users}
+
+
+def last_updated(rows):
+    """Most recent updated_at across the rows, as a datetime (None when empty)."""
+    stamps = [datetime.fromisoformat(row["updated_at"]) for row in rows if row.get("updated_at")]
+    return max(stamps) if stamps else None
@@ -0,0 +1,135 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from urllib.parse import unquote, urlsplit
+
+import http_client
+
+# Team logos, downloaded once per season into static/assets/logos so pages don't have to
+# hotlink upload.wikimedia.org. Files are resized and named after a hash of their content,
+# which lets init_app() serve them with a one-year immutable Cache-Control header.
+# manifest.json maps each remote logo URL to its local file.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+LOGO_DIR = os.path.join(STATIC_DIR, "assets", "logos")
+MANIFEST_PATH = os.path.join(LOGO_DIR, "manifest.json")
+LOGO_MAX_SIZE = (160, 160)  # Bounding box in pixels
+LOGO_MAX_AGE = 365 * 24 * 60 * 60  # Seconds; safe because a new logo gets a new file name
+
+_manifest = {"mtime": None, "entries": {}}
+_manifest_lock = threading.Lock()
+
+
+def load_manifest():
+    """Return {remote URL: file name}, re-reading manifest.json only when it changed."""
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return {}
+    with _manifest_lock:
+        if _manifest["mtime"] != mtime:
+            with open(MANIFEST_PATH) as f:
+                _manifest["entries"] = json.load(f)
+            _manifest["mtime"] = mtime
+        return _manifest["entries"]
+
+
+def is_logo_file(filename):
+    """True for a hashed logo under static/ (not the manifest, which changes in place)."""
+    return filename.startswith("assets/logos/") and not filename.endswith("manifest.json")
+
+
+def init_app(app):
+    """Serve logo files with a long-lived Cache-Control; only the static route pays for it."""
+    send_static_file = app.send_static_file
+
+    def send_static_or_logo(filename):
+        response = send_static_file(filename)
+        if is_logo_file(filename):
+            response.cache_control.no_cache = None  # Flask marks static files no-cache by default
+            response.cache_control.public = True
+            response.cache_control.max_age = LOGO_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    app.send_static_file = send_static_or_logo
+
+
+def _optimize(data):
+    """Shrink an image to LOGO_MAX_SIZE as an optimized PNG; returns (bytes, extension)."""
+    from PIL import Image  # Only needed when downloading logos
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail(LOGO_MAX_SIZE)
+        if image.mode not in ("RGBA", "LA", "L", "RGB", "P"):
+            image = image.convert("RGBA")
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=True)
+    return out.getvalue(), "png"
+
+
+def _slug(remote_url):
+    name = unquote(os.path.basename(urlsplit(remote_url).path))
+    name = re.sub(r"\.(svg|png|jpe?g|gif|webp)", "", name, flags=re.IGNORECASE)
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-").lower()[:60] or "logo"
+
+
+def download_logo(remote_url):
+    """Download, resize and store one logo; returns its file name in LOGO_DIR."""
+    response = http_client.get(remote_url)
+    response.raise_for_status()
+    try:
+        data, extension = _optimize(response.content)
+    except Exception as e:
+        # Keep the original file if it can't be resized (e.g. Pillow isn't installed)
+        print(f"Could not resize {remote_url}, storing it as is: {e}")
+        data = response.content
+        extension = os.path.splitext(urlsplit(remote_url).path)[1].lstrip(".").lower() or "png"
+
+    filename = f"{_slug(remote_url)}-{hashlib.sha256(data).hexdigest()[:12]}.{extension}"
+    path = os.path.join(LOGO_DIR, filename)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return filename
+
+
+def sync_logos(remote_urls):
+    """Download every logo that isn't in the manifest yet and save the manifest."""
+    os.makedirs(LOGO_DIR, exist_ok=True)
+    manifest = dict(load_manifest())
+    for remote_url in sorted(set(filter(None, remote_urls))):
+        if remote_url in manifest and os.path.exists(os.path.join(LOGO_DIR, manifest[remote_url])):
+            continue
+        try:
+            manifest[remote_url] = download_logo(remote_url)
+            print(f"Saved {remote_url} as {manifest[remote_url]}")
+        except Exception as e:
+            print(f"Error downloading logo {remote_url}: {e}")
+
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+    return manifest
+
+
+def season_driver_ids(year):
+    response = http_client.get(f"https://api.jolpi.ca/ergast/f1/{year}/drivers.json")
+    response.raise_for_status()
+    return [d["driverId"] for d in response.json()["MRData"]["DriverTable"]["Drivers"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download this season's team logos into static/assets/logos.")
+    parser.add_argument("--year", type=int, required=True)
+    args = parser.parse_args()
+
+    import constructor_utils  # Needs the Supabase constructors cache
+
+    teams = constructor_utils.get_constructors_and_logos(season_driver_ids(args.year), args.year)
+    manifest = sync_logos(team["team_logo"] for team in teams.values())
+    print(f"{len(manifest)} logos in {MANIFEST_PATH}")
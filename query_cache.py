@@ -0,0 +1,152 @@
+import copy
+import threading
+import time
+
+from flask import g, has_request_context
+
+# Request-scoped memoization for the storage client (Supabase or storage.SQLiteClient).
+# Within one request, a read with the same table, columns and filters runs once; any write
+# to a table (or an rpc() that writes it) forgets that table's cached reads. Every request
+# also counts its queries and DB time (see request_stats()). Outside a request (CLI, ingest
+# worker) queries go straight through.
+
+WRITE_ACTIONS = {"insert", "upsert", "update", "delete"}
+
+# Views and the tables they read from, so writing a table also forgets its views
+DEPENDENT_VIEWS = {
+    "selections": {"driver_usage"},
+}
+
+# Tables each stored procedure writes (unknown functions clear the whole request cache)
+RPC_WRITES = {
+    "make_pick": {"selections"},
+}
+
+
+class _RequestState:
+    def __init__(self):
+        self.lock = threading.Lock()  # fanout.gather() runs queries from several threads
+        self.results = {}  # (table, calls) -> response data
+        self.queries = 0
+        self.cached = 0
+        self.db_ms = 0.0
+
+    def forget(self, tables):
+        with self.lock:
+            if tables is None:
+                self.results.clear()
+                return
+            affected = set(tables)
+            for table in tables:
+                affected |= DEPENDENT_VIEWS.get(table, set())
+            for key in [key for key in self.results if key[0] in affected]:
+                del self.results[key]
+
+
+_state_lock = threading.Lock()
+
+
+def _state():
+    if not has_request_context():
+        return None
+    if "query_cache" not in g:
+        # The first queries of a request may come from several fanout.gather() threads at
+        # once; only one of them may create the state or the other's reads and counts are lost
+        with _state_lock:
+            if "query_cache" not in g:
+                g.query_cache = _RequestState()
+    return g.query_cache
+
+
+class CachedResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def _timed(state, run):
+    started = time.perf_counter()
+    try:
+        return run()
+    finally:
+        if state is not None:
+            with state.lock:
+                state.queries += 1
+                state.db_ms += (time.perf_counter() - started) * 1000
+
+
+class CachedQuery:
+    """Records the builder calls so identical reads can be recognised, then forwards them."""
+
+    def __init__(self, table, query):
+        self._table = table
+        self._query = query
+        self._calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._query, name)
+
+        def call(*args, **kwargs):
+            self._calls.append((name, repr(args), repr(sorted(kwargs.items()))))
+            self._query = method(*args, **kwargs)
+            return self
+
+        return call
+
+    def execute(self):
+        state = _state()
+        if any(name in WRITE_ACTIONS for name, _, _ in self._calls):
+            response = _timed(state, self._query.execute)
+            if state is not None:
+                state.forget({self._table})
+            return response
+
+        key = (self._table, tuple(self._calls))
+        if state is not None:
+            with state.lock:
+                if key in state.results:
+                    state.cached += 1
+                    return CachedResponse(copy.deepcopy(state.results[key]))
+
+        response = _timed(state, self._query.execute)
+        if state is not None:
+            with state.lock:
+                state.results[key] = copy.deepcopy(response.data)  # Callers may edit the rows they get back
+        return response
+
+
+class CachedRPC:
+    def __init__(self, name, call):
+        self._name = name
+        self._call = call
+
+    def execute(self):
+        state = _state()
+        response = _timed(state, self._call.execute)
+        if state is not None:
+            state.forget(RPC_WRITES.get(self._name))
+        return response
+
+
+class CachedClient:
+    """Wraps a storage client; table() and rpc() go through the request cache."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def table(self, name):
+        return CachedQuery(name, self.client.table(name))
+
+    def rpc(self, name, params=None):
+        return CachedRPC(name, self.client.rpc(name, params))
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def request_stats():
+    """Query count, cache hits and DB time for the current request."""
+    state = _state()
+    if state is None:
+        return {"queries": 0, "cached": 0, "db_ms": 0.0}
+    with state.lock:
+        return {"queries": state.queries, "cached": state.cached, "db_ms": state.db_ms}
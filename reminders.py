@@ -5,7 +5,7 @@ from datetime import datetime
 from supabase.client import create_client, Client
 from dotenv import load_dotenv
 import os
-import requests
+import http_client
 import pyautogui
 import time
 import pywhatkit as kit
@@ -38,7 +38,7 @@ def fetch_race_schedule():
     """Fetch the race schedule from an API."""
     url = f"https://api.jolpi.ca/ergast/f1/{YEAR}.json"
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         response.raise_for_status()
         data = response.json()
         races = [{"round": r["round"], "date": r["date"], "title": r["raceName"]} for r in data['MRData']['RaceTable']['Races']]
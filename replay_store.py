@@ -0,0 +1,147 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from datetime import date
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Record/replay for Jolpica responses, used by http_client.get(). Responses are stored
+# gzip-compressed on disk, one file per URL. HTTP_REPLAY_MODE:
+#   off      always use the live API (default)
+#   record   use the live API and save every successful response
+#   replay   serve saved responses, fetch (and save) anything missing
+#   offline  serve saved responses only; anything missing is a connection error
+# Round results that aren't published yet are never saved, so they keep being fetched live.
+# Pre-warm a whole season with:  python replay_store.py --season 2025
+MODE = os.getenv("HTTP_REPLAY_MODE", "off")
+STORE_DIR = os.getenv("HTTP_REPLAY_DIR", "replay_store")
+HOSTS = {"api.jolpi.ca"}
+SAVED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+RESULTS_PAGE_SIZE = 100  # Jolpica's maximum page size
+ROUND_RESULTS = re.compile(r"/ergast/f1/\d{4}/\d+/results\.json$")
+
+
+def handles(url):
+    return MODE != "off" and urlsplit(url).hostname in HOSTS
+
+
+def _path(url, store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, hashlib.sha256(url.encode()).hexdigest() + ".json.gz")
+
+
+def read_entry(url, store_dir=None):
+    """Return the saved {"url", "headers", "body"} for url, or None (whatever the mode)."""
+    try:
+        with gzip.open(_path(url, store_dir), "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load(url):
+    """Return the saved response for url as a requests.Response, or None."""
+    if MODE not in ("replay", "offline"):
+        return None
+    entry = read_entry(url)
+    if entry is None:
+        if MODE == "offline":
+            raise requests.ConnectionError(f"{url} is not in the replay store (offline mode)")
+        return None
+
+    response = requests.Response()
+    response.url = url
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.encoding = "utf-8"
+    response._content = entry["body"].encode("utf-8")
+    return response
+
+
+def _write(url, body, headers):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = _path(url)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"url": url, "headers": headers, "body": body}, f)
+    os.replace(tmp_path, path)
+
+
+def _unpublished_results(url, response):
+    """True for a round's results document before the results are out (empty Races)."""
+    if not ROUND_RESULTS.search(urlsplit(url).path):
+        return False
+    try:
+        return not response.json()["MRData"]["RaceTable"]["Races"]
+    except (ValueError, KeyError, TypeError):
+        return True
+
+
+def save(url, response):
+    """Save a successful live response (called by http_client.get())."""
+    # Like prewarm(), never store results that aren't published yet, or replay would serve
+    # the empty document forever and the round would never be scored
+    if response.status_code == 200 and not _unpublished_results(url, response):
+        headers = {name: response.headers[name] for name in SAVED_HEADERS if name in response.headers}
+        _write(url, response.text, headers)
+
+
+def save_json(url, data):
+    _write(url, json.dumps(data), {"Content-Type": "application/json"})
+
+
+def prewarm(year):
+    """Save everything the apps read for a season, using bulk requests where Jolpica allows."""
+    import http_client
+
+    base = f"https://api.jolpi.ca/ergast/f1/{year}"
+
+    def fetch(url):
+        response = http_client.get(url)
+        response.raise_for_status()
+        save_json(url, response.json())
+        return response.json()
+
+    schedule = fetch(f"{base}.json")
+    fetch(f"{base}/drivers.json")
+    fetch(f"{base}/driverStandings.json")
+
+    # Every result of the season in a few pages, then split into the per-round documents
+    # results.fetch_round_results() asks for
+    races = {}
+    results = defaultdict(list)
+    offset = 0
+    while True:
+        page = http_client.get(f"{base}/results.json", params={"limit": RESULTS_PAGE_SIZE, "offset": offset})
+        page.raise_for_status()
+        data = page.json()["MRData"]
+        for race in data["RaceTable"]["Races"]:
+            races.setdefault(race["round"], race)
+            results[race["round"]].extend(race["Results"])
+        offset += RESULTS_PAGE_SIZE
+        if offset >= int(data["total"]):
+            break
+
+    today = date.today().isoformat()
+    saved = 0
+    for race in schedule["MRData"]["RaceTable"]["Races"]:
+        race_round = race["round"]
+        if race_round not in races or race["date"] >= today:
+            continue  # Unfinished rounds stay live so new results are picked up
+        save_json(f"{base}/{race_round}/results.json", {
+            "MRData": {"RaceTable": {"season": str(year), "round": race_round, "Races": [{**races[race_round], "Results": results[race_round]}]}}
+        })
+        saved += 1
+    print(f"Saved the {year} schedule, drivers, standings and results for {saved} rounds to {STORE_DIR}/")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm the Jolpica replay store for a season.")
+    parser.add_argument("--season", type=int, required=True)
+    args = parser.parse_args()
+    prewarm(args.season)
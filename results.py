@@ -0,0 +1,165 @@
+import time
+from datetime import datetime
+
+import api_cache
+import changes
+import http_client
+import leaderboard
+
+# Race scoring shared by the web apps and the ingestion worker (ingest_results.py)
+F1_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+RESULTS_RETRY_BASE = 10 * 60  # First wait after a round's results turn out to be missing
+RESULTS_RETRY_MAX = 12 * 60 * 60  # Backoff ceiling for rounds that stay unpublished
+
+
+def points_for_position(position):
+    """Fantasy points for a finishing position (None outside the points)."""
+    if position and position <= len(F1_POINTS):
+        return F1_POINTS[position - 1]
+    return None
+
+
+def fetch_round_results(year, race_round):
+    """Download a round's results as {driver_code: position}, or None if not published yet."""
+    url = f"https://api.jolpi.ca/ergast/f1/{year}/{race_round}/results.json"
+    response = http_client.get(url)
+    response.raise_for_status()
+    races = response.json()["MRData"]["RaceTable"]["Races"]
+    if not races:
+        return None
+
+    positions = {}
+    for result in races[0]["Results"]:
+        position = result.get("position")
+        positions[result["Driver"]["code"]] = int(position) if position else None
+    return positions
+
+
+def refresh_roster_if_changed(year, driver_codes):
+    """Drop the cached season roster when driver_codes include a driver it doesn't know."""
+    url = f"https://api.jolpi.ca/ergast/f1/{year}/drivers.json"
+    roster = api_cache.peek(url)
+    if roster is None:
+        return
+    known = {d.get("code") for d in roster["MRData"]["DriverTable"]["Drivers"]}
+    newcomers = set(driver_codes) - known
+    if newcomers:
+        print(f"New drivers in the results ({', '.join(sorted(newcomers))}), refreshing the roster.")
+        api_cache.invalidate(url)
+
+
+def check_roster(client, year):
+    """Compare the cached roster with every driver in the stored results.
+
+    Called from the web app (see fetch_drivers()): round_results is shared, but the roster
+    lives in each host's api_cache.db, which the ingest worker's dyno can't reach.
+    """
+    rows = client.table("round_results").select("driver_code").execute().data
+    refresh_roster_if_changed(year, {row["driver_code"] for row in rows})
+    return True
+
+
+def store_round_results(client, race_round, positions):
+    """Save a round's full classification (driver code -> position/points) in one upsert."""
+    rows = [
+        {
+            "race_round": int(race_round),
+            "driver_code": driver,
+            "position": position,
+            "points": points_for_position(position),
+        }
+        for driver, position in positions.items()
+    ]
+    if rows:
+        client.table("round_results").upsert(rows, on_conflict="race_round,driver_code").execute()
+
+
+def load_round_results(client, race_round):
+    """Read a stored round back as {driver_code: points}."""
+    rows = client.table("round_results").select("driver_code, points").eq("race_round", int(race_round)).execute().data
+    return {row["driver_code"]: row["points"] for row in rows}
+
+
+def score_round(client, race_round, points_by_driver):
+    """Score every user's selection for a round with a single bulk upsert."""
+    selections = client.table("selections").select("username, race_round, selected_driver").eq("race_round", int(race_round)).execute().data
+    scored = [row for row in selections if row["selected_driver"] in points_by_driver]  # Drivers who didn't take part keep empty points
+    # Only points are written: a pick saved since the read above must not be put back
+    rows = [
+        {"username": row["username"], "race_round": int(race_round), "points": points_by_driver[row["selected_driver"]]}
+        for row in scored
+    ]
+    if rows:
+        client.table("selections").upsert(rows, on_conflict="username,race_round").execute()
+        changes.record(client, "selection", [
+            {"username": row["username"], "race_round": int(race_round), "selected_driver": row["selected_driver"], "points": points_by_driver[row["selected_driver"]]}
+            for row in scored
+        ])
+        leaderboard.refresh_users(client, {row["username"] for row in rows})
+    return rows
+
+
+def score_round_from_store(client, race_round):
+    """Re-score a round from stored results (e.g. after a late pick) without calling the API."""
+    points_by_driver = load_round_results(client, race_round)
+    if points_by_driver:
+        score_round(client, race_round, points_by_driver)
+
+
+def finalized_rounds(client):
+    """Return the set of rounds that have already been scored for good."""
+    rows = client.table("finalized_rounds").select("race_round").execute().data
+    return {int(row["race_round"]) for row in rows}
+
+
+def mark_finalized(client, race_round):
+    client.table("finalized_rounds").upsert({
+        "race_round": int(race_round),
+        "finalized_at": datetime.now().isoformat(),
+    }, on_conflict="race_round").execute()
+
+
+def ingest_completed_rounds(client, year, races, today=None):
+    """Score every completed round that isn't finalized yet. Returns the rounds scored."""
+    today = today or datetime.today().date()
+    done = finalized_rounds(client)
+    scored = []
+
+    for race in races:
+        race_round = int(race["round"])
+        race_date = datetime.strptime(race["date"], "%Y-%m-%d").date()
+        if race_date >= today or race_round in done:
+            continue
+
+        # Rounds known to be unpublished cost no outbound call until their next check
+        key = f"results:{year}:{race_round}"
+        next_check = api_cache.unavailable_until(key)
+        if next_check and next_check > time.time():
+            api_cache.incr("results_suppressed")
+            continue
+
+        api_cache.incr("results_requested")
+        try:
+            positions = fetch_round_results(year, race_round)
+        except Exception as e:
+            print(f"Error fetching race results for round {race_round}: {e}")
+            positions = None
+        if positions is None:
+            next_check = api_cache.mark_unavailable(key, RESULTS_RETRY_BASE, RESULTS_RETRY_MAX)
+            api_cache.incr("results_unavailable")
+            print(f"Results for round {race_round} are not available yet, next check at {datetime.fromtimestamp(next_check):%Y-%m-%d %H:%M}.")
+            continue
+        api_cache.clear_unavailable(key)
+
+        # A failed write leaves the round unfinalized, so the next pass scores it again
+        try:
+            store_round_results(client, race_round, positions)
+            score_round(client, race_round, {driver: points_for_position(position) for driver, position in positions.items()})
+            mark_finalized(client, race_round)
+        except Exception as e:
+            print(f"Error scoring round {race_round}: {e}")
+            continue
+        scored.append(race_round)
+        print(f"Round {race_round} scored and finalized.")
+
+    return scored
@@ -0,0 +1,60 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+
+# The season schedule parsed once into compact records, so views don't re-parse race
+# dates on every request. Built from the Jolpica schedule document and reused for as long
+# as api_cache hands back the same document (see from_jolpica()).
+
+
+@dataclass(frozen=True, slots=True)
+class Race:
+    round: int
+    title: str
+    date: date
+    iso_date: str  # As Jolpica sends it, YYYY-MM-DD
+    formatted_date: str  # MM/DD/YYYY, as shown on the home page
+
+
+class Schedule:
+    __slots__ = ("races", "dates", "by_round")
+
+    def __init__(self, races):
+        self.races = tuple(sorted(races, key=lambda race: race.date))
+        self.dates = [race.date for race in self.races]
+        self.by_round = {race.round: race for race in self.races}
+
+    def __iter__(self):
+        return iter(self.races)
+
+    def __len__(self):
+        return len(self.races)
+
+    def next_index(self, today):
+        """Index of the first race on or after today (len(self) once the season is over)."""
+        return bisect_left(self.dates, today)
+
+
+def _race(raw):
+    race_date = date.fromisoformat(raw["date"])
+    return Race(int(raw["round"]), raw["raceName"], race_date, raw["date"], race_date.strftime("%m/%d/%Y"))
+
+
+_built = {}  # schedule URL -> (document it was built from, Schedule)
+
+
+def from_jolpica(url, data):
+    """Return the Schedule for a Jolpica schedule document, reusing it while the document is unchanged."""
+    built = _built.get(url)
+    if built is None or built[0] is not data:
+        built = _built[url] = (data, Schedule(_race(raw) for raw in data["MRData"]["RaceTable"]["Races"]))
+    return built[1]
+
+
+@lru_cache(maxsize=4)
+def you_are_here(today):
+    """The marker row the home page inserts before the next race."""
+    return {"round": None, "title": "YOU ARE HERE", "date": today.isoformat(),
+            "formatted_date": today.strftime("%m/%d/%Y"), "you_are_here": True,
+            "can_select_driver": False, "selected_driver": None, "points": None}
@@ -0,0 +1,360 @@
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# Storage backends. Both expose the small part of the supabase-py query builder the apps
+# use (table().select/insert/upsert/update/delete + eq/neq/in_/is_/gt/gte/lt/lte/order/limit
+# + execute().data, and rpc() for stored procedures), so views don't care which one is configured.
+#
+# config.json / config25.json:
+#   "storage": {"backend": "supabase"}                               (default)
+#   "storage": {"backend": "sqlite", "path": "fantasy_f1_local.db"}
+# The STORAGE_BACKEND / STORAGE_PATH environment variables override the config file.
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS selections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        race_round INTEGER NOT NULL,
+        selected_driver TEXT,
+        points INTEGER
+    )''',
+    "CREATE UNIQUE INDEX IF NOT EXISTS selections_username_race_round ON selections (username, race_round)",
+    "CREATE INDEX IF NOT EXISTS selections_username_driver ON selections (username, selected_driver)",
+    "CREATE INDEX IF NOT EXISTS selections_race_round ON selections (race_round)",
+    '''CREATE VIEW IF NOT EXISTS driver_usage AS
+        SELECT username, selected_driver AS driver_code, COUNT(*) AS selection_count
+        FROM selections
+        WHERE selected_driver IS NOT NULL
+        GROUP BY username, selected_driver''',
+    '''CREATE TABLE IF NOT EXISTS finalized_rounds (
+        race_round INTEGER PRIMARY KEY,
+        finalized_at TEXT NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS round_results (
+        race_round INTEGER NOT NULL,
+        driver_code TEXT NOT NULL,
+        position INTEGER,
+        points INTEGER,
+        PRIMARY KEY (race_round, driver_code)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS leaderboard (
+        username TEXT PRIMARY KEY,
+        total_points INTEGER NOT NULL DEFAULT 0,
+        race_rounds TEXT NOT NULL DEFAULT '[]',
+        cumulative_points TEXT NOT NULL DEFAULT '[]',
+        updated_at TEXT NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS change_log (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        username TEXT,
+        race_round INTEGER,
+        payload TEXT NOT NULL DEFAULT '{}',
+        created_at TEXT NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS constructors (
+        driver_id TEXT NOT NULL,
+        season INTEGER NOT NULL,
+        team_name TEXT,
+        team_logo TEXT,
+        last_updated TEXT,
+        PRIMARY KEY (driver_id, season)
+    )''',
+]
+
+# Conflict target used by upsert() when no on_conflict is given (like Postgres primary keys)
+PRIMARY_KEYS = {
+    "selections": ["id"],
+    "finalized_rounds": ["race_round"],
+    "round_results": ["race_round", "driver_code"],
+    "leaderboard": ["username"],
+    "constructors": ["driver_id", "season"],
+    "change_log": ["version"],
+}
+
+# Columns stored as JSON text in SQLite (jsonb in Supabase)
+JSON_COLUMNS = {
+    "leaderboard": {"race_rounds", "cumulative_points"},
+    "change_log": {"payload"},
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _quote(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column or table name: {name!r}")
+    return f'"{name}"'
+
+
+class APIResponse:
+    """Mimics supabase-py's response object (only .data is used by the apps)."""
+
+    def __init__(self, data):
+        self.data = data
+
+
+class SQLiteQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.columns = ["*"]
+        self.payload = None
+        self.on_conflict = None
+        self.where = []
+        self.params = []
+        self.order_by = []
+        self.limit_to = None
+
+    # Actions
+    def select(self, *columns, **kwargs):
+        self.action = "select"
+        names = [c.strip() for column in columns for c in column.split(",") if c.strip()]
+        self.columns = names or ["*"]
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **kwargs):
+        self.action, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # Filters
+    def _filter(self, column, operator, value):
+        self.where.append(f"{_quote(column)} {operator} ?")
+        self.params.append(value)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self.where.append("0")
+            return self
+        self.where.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+        self.params.extend(values)
+        return self
+
+    def is_(self, column, value):
+        if value in (None, "null"):
+            self.where.append(f"{_quote(column)} IS NULL")
+            return self
+        return self._filter(column, "IS", value)
+
+    def order(self, column, desc=False):
+        self.order_by.append(f"{_quote(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, count):
+        self.limit_to = int(count)
+        return self
+
+    # Execution
+    def _where_sql(self):
+        return f" WHERE {' AND '.join(self.where)}" if self.where else ""
+
+    def _encode(self, row):
+        json_columns = JSON_COLUMNS.get(self.table, ())
+        return {k: json.dumps(v) if k in json_columns else v for k, v in row.items()}
+
+    def _decode(self, row):
+        json_columns = JSON_COLUMNS.get(self.table, ())
+        return {k: json.loads(v) if k in json_columns and v is not None else v for k, v in dict(row).items()}
+
+    def execute(self):
+        with self.client.serialized():
+            return self._execute()
+
+    def _execute(self):
+        conn = self.client.connection()
+        table = _quote(self.table)
+
+        if self.action == "select":
+            columns = "*" if self.columns == ["*"] else ", ".join(_quote(c) for c in self.columns)
+            sql = f"SELECT {columns} FROM {table}{self._where_sql()}"
+            if self.order_by:
+                sql += f" ORDER BY {', '.join(self.order_by)}"
+            if self.limit_to is not None:
+                sql += f" LIMIT {self.limit_to}"
+            return APIResponse([self._decode(row) for row in conn.execute(sql, self.params)])
+
+        if self.action == "update":
+            values = self._encode(self.payload)
+            assignments = ", ".join(f"{_quote(k)} = ?" for k in values)
+            sql = f"UPDATE {table} SET {assignments}{self._where_sql()} RETURNING *"
+            return APIResponse([self._decode(row) for row in conn.execute(sql, [*values.values(), *self.params])])
+
+        if self.action == "delete":
+            sql = f"DELETE FROM {table}{self._where_sql()} RETURNING *"
+            return APIResponse([self._decode(row) for row in conn.execute(sql, self.params)])
+
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        written = []
+        with self.client.transaction() as tx:
+            for row in rows:
+                values = self._encode(row)
+                columns = ", ".join(_quote(k) for k in values)
+                sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join('?' * len(values))})"
+                if self.action == "upsert":
+                    keys = [k.strip() for k in self.on_conflict.split(",")] if self.on_conflict else PRIMARY_KEYS[self.table]
+                    updates = ", ".join(f"{_quote(k)} = excluded.{_quote(k)}" for k in values if k not in keys)
+                    target = ", ".join(_quote(k) for k in keys)
+                    sql += f" ON CONFLICT ({target}) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING")
+                written.extend(self._decode(r) for r in tx.execute(sql + " RETURNING *", list(values.values())))
+        return APIResponse(written)
+
+
+def _make_pick(conn, p_username, p_race_round, p_driver, p_unique_until_round=20):
+    """SQLite version of the make_pick() Postgres function (see supabase/migrations)."""
+    row = conn.execute(
+        "SELECT selected_driver FROM selections WHERE username = ? AND race_round = ?", (p_username, p_race_round)
+    ).fetchone()
+    previous = row[0] if row else None
+    if previous == p_driver:
+        return "ok"
+
+    count = conn.execute(
+        "SELECT COUNT(*) FROM selections WHERE username = ? AND selected_driver = ?", (p_username, p_driver)
+    ).fetchone()[0]
+    if count >= 1 and p_race_round <= p_unique_until_round:
+        return "already_picked"
+    if count >= 2:
+        return "max_picks"
+
+    conn.execute(
+        "INSERT INTO selections (username, race_round, selected_driver, points) VALUES (?, ?, ?, NULL) "
+        "ON CONFLICT (username, race_round) DO UPDATE SET selected_driver = excluded.selected_driver, points = NULL",
+        (p_username, p_race_round, p_driver),
+    )
+    return "ok"
+
+
+# Stored procedures callable through client.rpc(name, params), mirroring the Postgres functions
+RPC_FUNCTIONS = {
+    "make_pick": _make_pick,
+}
+
+
+class SQLiteRPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.function = RPC_FUNCTIONS[name]
+        self.params = params or {}
+
+    def execute(self):
+        # Runs in one write transaction, so concurrent calls can't interleave
+        with self.client.transaction() as conn:
+            return APIResponse(self.function(conn, **self.params))
+
+
+class _Transaction:
+    def __init__(self, client):
+        self.client = client
+        self.conn = client.connection()
+        self.serialized = client.serialized()
+
+    def __enter__(self):
+        self.serialized.__enter__()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.serialized.__exit__(exc_type, exc, tb)
+        return False
+
+
+class SQLiteClient:
+    """Local SQLite storage with the same query interface as the Supabase client."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._anchor = None
+        self._memory_lock = None
+        if path == ":memory:":
+            # One shared in-memory database for every thread, kept alive by an anchor connection.
+            # Shared-cache tables lock without honouring the busy timeout, so statements take turns.
+            self.path = f"file:fantasyf1-{id(self)}?mode=memory&cache=shared"
+            self._memory_lock = threading.RLock()
+            self._anchor = self.connection()
+        self._create_schema()
+
+    def connection(self):
+        """Return this thread's connection (sqlite3 connections can't be shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():  # Not after a fork (gunicorn --preload)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, uri=self.path.startswith("file:"))
+            conn.row_factory = sqlite3.Row
+            if not self.path.startswith("file:"):
+                conn.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def serialized(self):
+        """Lock held around each statement for in-memory databases (a no-op for files)."""
+        return self._memory_lock or contextlib.nullcontext()
+
+    def _create_schema(self):
+        conn = self.connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def table(self, name):
+        return SQLiteQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return SQLiteRPC(self, name, params)
+
+
+def create_client(config, url=None, key=None):
+    """Build the storage client selected by config["storage"] (Supabase by default)."""
+    settings = config.get("storage", {})
+    backend = os.getenv("STORAGE_BACKEND", settings.get("backend", "supabase"))
+
+    if backend == "sqlite":
+        return SQLiteClient(os.getenv("STORAGE_PATH", settings.get("path", "fantasy_f1_local.db")))
+    if backend == "supabase":
+        from supabase.client import create_client as create_supabase_client  # Only needed for this backend
+        return create_supabase_client(url, key)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,6 @@
+-- Rounds whose results have been ingested and scored by ingest_results.py.
+-- The web app never fetches results for these (or any) rounds itself.
+create table if not exists finalized_rounds (
+    race_round integer primary key,
+    finalized_at timestamptz not null default now()
+);
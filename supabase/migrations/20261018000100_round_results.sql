@@ -0,0 +1,12 @@
+-- Full classification of each scored round, downloaded once by ingest_results.py.
+create table if not exists round_results (
+    race_round integer not null,
+    driver_code text not null,
+    position integer,
+    points integer,
+    primary key (race_round, driver_code)
+);
+
+-- Lets results.score_round() write a whole round with one upsert on (username, race_round).
+create unique index if not exists selections_username_race_round_key
+    on selections (username, race_round);
@@ -0,0 +1,9 @@
+-- Materialized leaderboard maintained by leaderboard.refresh_users() whenever a round is
+-- scored or a pick changes. race_rounds/cumulative_points hold each player's running total.
+create table if not exists leaderboard (
+    username text primary key,
+    total_points integer not null default 0,
+    race_rounds jsonb not null default '[]'::jsonb,
+    cumulative_points jsonb not null default '[]'::jsonb,
+    updated_at timestamptz not null default now()
+);
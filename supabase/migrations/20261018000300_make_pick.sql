@@ -0,0 +1,63 @@
+-- make_pick() upserts the per-driver counts on (username, driver_code)
+create unique index if not exists driver_selections_username_driver_code_idx
+    on driver_selections (username, driver_code);
+
+-- One-round-trip, transactional pick used by app25's select_driver POST.
+-- Validates the repeat rules, swaps the per-driver counts and saves the pick atomically.
+-- Returns 'ok', 'already_picked' (driver used before all drivers were) or 'max_picks'.
+create or replace function make_pick(
+    p_username text,
+    p_race_round integer,
+    p_driver text,
+    p_unique_until_round integer default 20
+) returns text
+language plpgsql
+as $$
+declare
+    v_count integer;
+    v_previous text;
+begin
+    -- Serialize picks per player so two tabs submitting at once can't interleave
+    perform pg_advisory_xact_lock(hashtext('make_pick:' || p_username));
+
+    select selected_driver into v_previous
+    from selections
+    where username = p_username and race_round = p_race_round;
+
+    if v_previous = p_driver then
+        return 'ok';  -- Re-submitting the current pick changes nothing
+    end if;
+
+    select coalesce(max(selection_count), 0) into v_count
+    from driver_selections
+    where username = p_username and driver_code = p_driver;
+
+    if v_count >= 1 and p_race_round <= p_unique_until_round then
+        return 'already_picked';
+    end if;
+    if v_count >= 2 then
+        return 'max_picks';
+    end if;
+
+    -- Give the previous driver's pick back
+    if v_previous is not null then
+        update driver_selections
+        set selection_count = selection_count - 1
+        where username = p_username and driver_code = v_previous;
+        delete from driver_selections
+        where username = p_username and driver_code = v_previous and selection_count <= 0;
+    end if;
+
+    insert into selections (username, race_round, selected_driver, points)
+    values (p_username, p_race_round, p_driver, null)
+    on conflict (username, race_round)
+    do update set selected_driver = excluded.selected_driver, points = null;
+
+    insert into driver_selections (username, driver_code, selection_count)
+    values (p_username, p_driver, 1)
+    on conflict (username, driver_code)
+    do update set selection_count = driver_selections.selection_count + 1;
+
+    return 'ok';
+end;
+$$;
@@ -0,0 +1,54 @@
+-- Driver usage is derived from the picks themselves instead of the hand-maintained
+-- driver_selections counter, so it can never drift. driver_selections is no longer written.
+create index if not exists selections_username_selected_driver_idx
+    on selections (username, selected_driver);
+
+create or replace view driver_usage as
+select username, selected_driver as driver_code, count(*)::integer as selection_count
+from selections
+where selected_driver is not null
+group by username, selected_driver;
+
+-- make_pick() now counts from selections and only writes the pick itself.
+create or replace function make_pick(
+    p_username text,
+    p_race_round integer,
+    p_driver text,
+    p_unique_until_round integer default 20
+) returns text
+language plpgsql
+as $$
+declare
+    v_count integer;
+    v_previous text;
+begin
+    -- Serialize picks per player so two tabs submitting at once can't interleave
+    perform pg_advisory_xact_lock(hashtext('make_pick:' || p_username));
+
+    select selected_driver into v_previous
+    from selections
+    where username = p_username and race_round = p_race_round;
+
+    if v_previous = p_driver then
+        return 'ok';  -- Re-submitting the current pick changes nothing
+    end if;
+
+    select count(*) into v_count
+    from selections
+    where username = p_username and selected_driver = p_driver;
+
+    if v_count >= 1 and p_race_round <= p_unique_until_round then
+        return 'already_picked';
+    end if;
+    if v_count >= 2 then
+        return 'max_picks';
+    end if;
+
+    insert into selections (username, race_round, selected_driver, points)
+    values (p_username, p_race_round, p_driver, null)
+    on conflict (username, race_round)
+    do update set selected_driver = excluded.selected_driver, points = null;
+
+    return 'ok';
+end;
+$$;
@@ -0,0 +1,10 @@
+-- Change feed behind GET /changes?since=N. Picks, scoring passes and leaderboard refreshes
+-- append one row per changed record; the identity column is the season version.
+create table if not exists change_log (
+    version bigint generated always as identity primary key,
+    kind text not null,  -- 'selection', 'leaderboard' or 'reset'
+    username text,
+    race_round integer,
+    payload jsonb not null default '{}'::jsonb,
+    created_at timestamptz not null default now()
+);
@@ -0,0 +1,28 @@
+-- Identity values are handed out at insert time, not at commit, so a poller could see
+-- version N+1 before N commits and skip N for good. Versions now come from a single
+-- counter row bumped by the inserting transaction: its row lock is held until commit,
+-- so the next writer waits and versions become visible in order.
+create table if not exists change_log_version (
+    id boolean primary key default true check (id),  -- One row per season database
+    version bigint not null
+);
+
+insert into change_log_version (id, version)
+select true, coalesce(max(version), 0) from change_log
+on conflict (id) do nothing;
+
+alter table change_log alter column version drop identity if exists;
+
+create or replace function change_log_next_version() returns trigger
+language plpgsql
+as $$
+begin
+    update change_log_version set version = version + 1 returning version into new.version;
+    return new;
+end;
+$$;
+
+drop trigger if exists change_log_next_version on change_log;
+create trigger change_log_next_version
+    before insert on change_log
+    for each row execute function change_log_next_version();
@@ -0,0 +1,33 @@
+import time
+
+import api_cache
+
+# Warm-up run once before serving traffic. Under gunicorn --preload (gunicorn.conf.py) it
+# runs in the master, so every forked worker starts with the season data already parsed
+# in memory (api_cache's memory layer, the schedule model, compiled templates) and shares
+# it copy-on-write, instead of each worker paying for a cold start. Everything here runs
+# on the master's own thread: a thread still running (or holding a lock) when the master
+# forks would be missing, or deadlock, in every worker.
+
+
+def warm(app_module):
+    """Pre-load schedule, roster and templates for one of the apps (app3/app25)."""
+    started = time.perf_counter()
+
+    with api_cache.refresh_in_foreground():
+        races = app_module.fetch_race_schedule()
+        app_module.fetch_schedule_model()  # Parsed once here, inherited by the workers
+        try:
+            roster = app_module.fetch_roster()
+        except Exception as e:
+            print(f"Warm-up could not load the driver roster: {e}")
+            roster = []
+
+    api_cache.flush_counters()  # Workers drop counts still pending in the master
+
+    # Compile every template now rather than on each worker's first render
+    for name in app_module.app.jinja_env.list_templates(extensions=["html"]):
+        app_module.app.jinja_env.get_template(name)
+
+    print(f"Warm-up for {app_module.YEAR}: {len(races)} races, {len(roster)} drivers "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")